@@ -1,7 +1,17 @@
 from django.contrib import admin
 from guardian.admin import GuardedModelAdmin
 
-from dandi.publish.models import Asset, Dandiset, DraftVersion, Version
+from dandi.publish.models import (
+    ArchiveStats,
+    Asset,
+    Dandiset,
+    DandisetStorage,
+    DraftVersion,
+    PendingDraftSync,
+    StatsSnapshot,
+    Version,
+    VersionFacet,
+)
 
 
 @admin.register(Dandiset)
@@ -9,6 +19,13 @@ class DandisetAdmin(admin.ModelAdmin):
     readonly_fields = ['identifier']
 
 
+@admin.register(DandisetStorage)
+class DandisetStorageAdmin(admin.ModelAdmin):
+    list_display = ['dandiset', 'logical_size', 'unique_size', 'duplicate_size']
+    readonly_fields = list_display
+    ordering = ['-logical_size']
+
+
 @admin.register(DraftVersion)
 class DraftVersionAdmin(GuardedModelAdmin):
     list_display = ['dandiset', 'name']
@@ -17,7 +34,7 @@ class DraftVersionAdmin(GuardedModelAdmin):
 
 @admin.register(Version)
 class VersionAdmin(admin.ModelAdmin):
-    list_display = ['id', 'dandiset', 'version']
+    list_display = ['id', 'dandiset', 'version', 'assets_count', 'size']
     list_display_links = ['id', 'version']
 
 
@@ -25,3 +42,32 @@ class VersionAdmin(admin.ModelAdmin):
 class AssetAdmin(admin.ModelAdmin):
     list_display = ['id', 'uuid', 'path']
     list_display_links = ['id', 'uuid']
+
+
+@admin.register(VersionFacet)
+class VersionFacetAdmin(admin.ModelAdmin):
+    list_display = ['id', 'version', 'facet', 'value', 'count']
+    list_display_links = ['id']
+    list_filter = ['facet']
+
+
+@admin.register(ArchiveStats)
+class ArchiveStatsAdmin(admin.ModelAdmin):
+    list_display = [
+        'dandiset_count',
+        'published_dandiset_count',
+        'user_count',
+        'size',
+        'reconciled',
+    ]
+    readonly_fields = list_display
+
+
+@admin.register(StatsSnapshot)
+class StatsSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['date', 'dandiset_count', 'published_dandiset_count', 'user_count', 'size']
+
+
+@admin.register(PendingDraftSync)
+class PendingDraftSyncAdmin(admin.ModelAdmin):
+    list_display = ['draft_folder_id', 'created', 'claimed']
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PublishConfig(AppConfig):
     name = 'dandi.publish'
     verbose_name = 'DANDI: Publish'
+
+    def ready(self):
+        # Connect signal receivers
+        from dandi.publish import signals  # noqa: F401
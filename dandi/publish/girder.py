@@ -19,6 +19,9 @@ class GirderFile:
 
 
 class GirderClient(Client):
+    # The collection containing a folder for each Dandiset draft
+    DRAFTS_COLLECTION_PATH = '/collection/drafts'
+
     def __init__(self, authenticate=False, **kwargs):
         girder_api_url = settings.DANDI_GIRDER_API_URL
         girder_api_key = settings.DANDI_GIRDER_API_KEY
@@ -48,6 +51,12 @@ class GirderClient(Client):
     def get_folder(self, folder_id: str) -> Dict:
         return self.get_json(f'folder/{folder_id}')
 
+    def get_draft_folders(self) -> List[Dict]:
+        collection = self.get_json('resource/lookup', params={'path': self.DRAFTS_COLLECTION_PATH})
+        return self.get_json(
+            'folder', params={'parentId': collection['_id'], 'parentType': 'collection', 'limit': 0}
+        )
+
     def get_subfolders(self, folder_id: str) -> List[Dict]:
         return self.get_json(
             'folder', params={'parentId': folder_id, 'parentType': 'folder', 'limit': 0}
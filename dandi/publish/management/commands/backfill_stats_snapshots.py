@@ -0,0 +1,77 @@
+from collections import defaultdict
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from dandi.publish.models import Dandiset, StatsSnapshot, Version
+
+
+class Command(BaseCommand):
+    help = (
+        'Record snapshots of the archive statistics of all past days, from creation times. '
+        'Existing snapshots are not changed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of snapshots to insert per query.',
+        )
+
+    def handle(self, *args, batch_size: int, **options):
+        today = timezone.localdate()
+        # The change of each statistic on each day
+        changes = defaultdict(lambda: defaultdict(int))
+
+        def add_changes(field, queryset, date_field, value):
+            daily = (
+                queryset.filter(**{f'{date_field}__date__lt': today})
+                .annotate(day=TruncDate(date_field))
+                .order_by()
+                .values('day')
+                .annotate(value=value)
+            )
+            for row in daily:
+                changes[row['day']][field] += row['value'] or 0
+
+        add_changes('dandiset_count', Dandiset.objects.all(), 'created', Count('pk'))
+        # A Dandiset is published when its first Version is created
+        first_versions = (
+            Version.objects.order_by().values('dandiset').annotate(published=Min('created'))
+        )
+        for row in first_versions.iterator():
+            day = timezone.localtime(row['published']).date()
+            if day < today:
+                changes[day]['published_dandiset_count'] += 1
+        add_changes('user_count', User.objects.all(), 'date_joined', Count('pk'))
+        # The denormalized Version sizes are used, as aggregating assets would be far slower
+        add_changes('size', Version.objects.all(), 'created', Sum('size'))
+
+        if not changes:
+            self.stdout.write('There is no history to backfill')
+            return
+
+        totals = dict.fromkeys(
+            ['dandiset_count', 'published_dandiset_count', 'user_count', 'size'], 0
+        )
+        snapshots = []
+        days = 0
+        day = min(changes)
+        while day < today:
+            for field, change in changes[day].items():
+                totals[field] += change
+            snapshots.append(StatsSnapshot(date=day, **totals))
+            if len(snapshots) == batch_size:
+                StatsSnapshot.objects.bulk_create(snapshots, ignore_conflicts=True)
+                snapshots = []
+            days += 1
+            day += datetime.timedelta(days=1)
+        StatsSnapshot.objects.bulk_create(snapshots, ignore_conflicts=True)
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled snapshots of {days} days'))
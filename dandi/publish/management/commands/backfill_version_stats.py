@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+from django.db.models import BigIntegerField, Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from dandi.publish.models import (
+    ArchiveStats,
+    Asset,
+    Dandiset,
+    DandisetStorage,
+    Version,
+    VersionFacet,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Populate the denormalized asset statistics and facets of all existing Versions, '
+        'and the storage of all Dandisets.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of Versions to update per query.',
+        )
+
+    def handle(self, *args, batch_size: int, **options):
+        version_assets = Asset.objects.filter(version=OuterRef('pk')).order_by().values('version')
+        assets_count = Subquery(
+            version_assets.annotate(count=Count('id')).values('count'),
+            output_field=IntegerField(),
+        )
+        size = Subquery(
+            version_assets.annotate(total_size=Sum('size')).values('total_size'),
+            output_field=BigIntegerField(),
+        )
+
+        updated = 0
+        last_pk = 0
+        while True:
+            # Walk the primary keys, so each batch is a small, independent transaction
+            batch = list(
+                Version.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            Version.objects.filter(pk__in=batch).update(
+                assets_count=Coalesce(assets_count, 0), size=Coalesce(size, 0)
+            )
+            for version in Version.objects.select_related(None).filter(pk__in=batch).only('pk'):
+                VersionFacet.populate(version)
+            updated += len(batch)
+            last_pk = batch[-1]
+            self.stdout.write(f'Updated {updated} versions')
+
+        for dandiset in Dandiset.objects.iterator():
+            DandisetStorage.reconcile(dandiset)
+
+        # Version sizes were changed without incrementing the archive size
+        ArchiveStats.reconcile()
+        self.stdout.write(self.style.SUCCESS(f'Backfilled statistics of {updated} versions'))
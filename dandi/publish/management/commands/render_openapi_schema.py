@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from dandi.publish.openapi import render_schema
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the OpenAPI schema to a file, which is served when DANDI_OPENAPI_SCHEMA_FILE '
+        'is set to its path.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Path of the JSON file to write.')
+        parser.add_argument(
+            '--url',
+            required=True,
+            help='Base URL of the API in the schema, e.g. "https://api.dandiarchive.org".',
+        )
+
+    def handle(self, *args, output: str, url: str, **options):
+        content = render_schema(url=url)
+        with open(output, 'wb') as output_file:
+            output_file.write(content)
+        self.stdout.write(self.style.SUCCESS(f'Rendered the OpenAPI schema to {output}'))
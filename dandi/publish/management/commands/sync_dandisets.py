@@ -0,0 +1,31 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from dandi.publish.girder import GirderClient
+from dandi.publish.models import Dandiset
+
+
+class Command(BaseCommand):
+    help = 'Sync Dandisets and their drafts from Girder, and report what changed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'folder_ids',
+            nargs='*',
+            metavar='FOLDER_ID',
+            help='Girder draft folders to sync. By default, every draft folder is synced.',
+        )
+
+    def handle(self, *args, folder_ids, **options):
+        with GirderClient() as client:
+            if folder_ids:
+                outcomes = Dandiset.sync_from_girder(folder_ids, client)
+            else:
+                outcomes = Dandiset.reconcile_girder(client)
+
+        for folder_id, outcome in outcomes.items():
+            if outcome != Dandiset.SYNC_UNCHANGED:
+                self.stdout.write(f'{folder_id}: {outcome}')
+        for outcome, count in sorted(Counter(outcomes.values()).items()):
+            self.stdout.write(self.style.SUCCESS(f'{count} {outcome}'))
@@ -0,0 +1,63 @@
+"""
+Counters and latency histograms, kept in the memory of each process.
+
+Observations are recorded on the path of requests, e.g. for every presigned URL, so they must not
+wait on any external service. Each process thus only reports its own metrics, since it started.
+"""
+
+import bisect
+from collections import Counter
+import threading
+from typing import Any, Dict, List
+
+# The upper bounds of the latency histogram buckets, in seconds; the last bucket is unbounded
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+_counters: Counter = Counter()
+# Requests may be served by many threads of a process
+_counters_lock = threading.Lock()
+
+
+def increment(key: str, delta: int = 1) -> int:
+    with _counters_lock:
+        _counters[key] += delta
+        return _counters[key]
+
+
+def get_counter(key: str) -> int:
+    return _counters[key]
+
+
+def reset() -> None:
+    with _counters_lock:
+        _counters.clear()
+
+
+def observe(name: str, duration: float, error: bool = False) -> None:
+    """Record one occurrence of an operation, which took duration seconds."""
+    bucket = bisect.bisect_left(LATENCY_BUCKETS, duration)
+    with _counters_lock:
+        _counters[f'{name}:count'] += 1
+        if error:
+            _counters[f'{name}:errors'] += 1
+        # Durations are summed in microseconds, as the counters are integers
+        _counters[f'{name}:duration'] += int(duration * 1_000_000)
+        _counters[f'{name}:bucket:{bucket}'] += 1
+
+
+def get_stats(names: List[str]) -> Dict[str, Any]:
+    stats = {}
+    with _counters_lock:
+        for name in names:
+            count = _counters[f'{name}:count']
+            duration = _counters[f'{name}:duration'] / 1_000_000
+            stats[name] = {
+                'count': count,
+                'errors': _counters[f'{name}:errors'],
+                'mean_duration': duration / count if count else None,
+                'histogram': [
+                    {'le': bound, 'count': _counters[f'{name}:bucket:{index}']}
+                    for index, bound in enumerate(LATENCY_BUCKETS + [None])
+                ],
+            }
+    return stats
@@ -0,0 +1,91 @@
+import contextlib
+import json
+import logging
+import time
+from typing import Iterator
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from dandi.publish import request_timing
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimingMiddleware:
+    """
+    Measure the database queries, cache hits and storage calls of each request.
+
+    Each request is logged as a JSON object, and its response gets a Server-Timing header. Streamed
+    responses are only logged once their content ends, so the work done while streaming counts.
+    Requests which are slower, or run more queries, than the configured thresholds are logged as
+    warnings. This is only installed if DANDI_REQUEST_TIMING is set.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DANDI_REQUEST_TIMING:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = request_timing.RequestTiming()
+        start = time.monotonic()
+        with self._measure(timing):
+            response = self.get_response(request)
+
+        if response.streaming:
+            # The content of a streamed response, e.g. its queries, is only produced after its
+            # headers are sent, so it has no Server-Timing, and it's logged once it ends
+            response.streaming_content = self._measure_stream(
+                request, response, timing, start, response.streaming_content
+            )
+        else:
+            duration = time.monotonic() - start
+            response['Server-Timing'] = timing.server_timing(duration)
+            self._log(request, response, timing, duration, streamed=False)
+        return response
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _measure(timing: request_timing.RequestTiming) -> Iterator[None]:
+        token = request_timing.activate(timing)
+        try:
+            with connection.execute_wrapper(timing.execute_wrapper):
+                yield
+        finally:
+            request_timing.deactivate(token)
+
+    def _measure_stream(self, request, response, timing, start, streaming_content):
+        try:
+            with self._measure(timing):
+                yield from streaming_content
+        finally:
+            # This also runs if the client disconnects, as the server then closes the response
+            self._log(request, response, timing, time.monotonic() - start, streamed=True)
+
+    def _log(self, request, response, timing, duration: float, streamed: bool) -> None:
+        flags = []
+        if duration > settings.DANDI_REQUEST_TIMING_SLOW_DURATION:
+            flags.append('slow')
+        if timing.db_queries > settings.DANDI_REQUEST_TIMING_MAX_QUERIES:
+            flags.append('too_many_queries')
+        logger.log(
+            logging.WARNING if flags else logging.INFO,
+            json.dumps(
+                {
+                    'method': request.method,
+                    'path': request.path,
+                    'status': response.status_code,
+                    'streamed': streamed,
+                    'duration_ms': round(duration * 1000, 1),
+                    'db_queries': timing.db_queries,
+                    'db_ms': round(timing.db_duration * 1000, 1),
+                    'storage_calls': timing.storage_calls,
+                    'storage_ms': round(timing.storage_duration * 1000, 1),
+                    'cache_hits': timing.cache_hits,
+                    'cache_misses': timing.cache_misses,
+                    'flags': flags,
+                }
+            ),
+        )
@@ -0,0 +1,30 @@
+# Generated by Django 3.0.9 on 2026-10-18 23:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publish', '0013_guardian_owner'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='draftversion',
+            options={
+                'get_latest_by': 'created',
+                'permissions': [('owner', 'Owns the draft version')],
+            },
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='assets_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='size',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
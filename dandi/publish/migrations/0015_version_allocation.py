@@ -0,0 +1,23 @@
+# Generated by Django 3.0.9 on 2026-10-18 23:26
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publish', '0014_version_asset_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='version',
+            name='version',
+            field=models.CharField(
+                blank=True,
+                max_length=13,
+                validators=[django.core.validators.RegexValidator('^0\\.\\d{6}\\.\\d{4}$')],
+            ),
+        ),
+    ]
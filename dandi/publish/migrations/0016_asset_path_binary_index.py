@@ -0,0 +1,19 @@
+# Generated by Django 3.0.9 on 2026-10-18 23:27
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publish', '0015_version_allocation'),
+    ]
+
+    operations = [
+        # Version diffs merge assets in code point order, which this index serves directly
+        migrations.RunSQL(
+            'CREATE INDEX publish_asset_version_path_c_idx '
+            'ON publish_asset (version_id, path COLLATE "C");',
+            reverse_sql='DROP INDEX publish_asset_version_path_c_idx;',
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 3.0.9 on 2026-10-18 23:28
+
+from django.contrib.postgres.fields.jsonb import KeyTextTransform, KeyTransform
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+from django.db.models.functions import Cast, LPad
+
+
+def populate_search_vector(apps, schema_editor):
+    Version = apps.get_model('publish', 'Version')  # noqa: N806
+
+    # This must match Version.search_document at the time of this migration
+    Version.objects.update(
+        search_vector=(
+            SearchVector('name', weight='A', config='english')
+            + SearchVector(
+                LPad(Cast('dandiset_id', models.TextField()), 6, models.Value('0')),
+                weight='A',
+                config='english',
+            )
+            + SearchVector(
+                KeyTextTransform('description', 'metadata'), weight='B', config='english'
+            )
+            + SearchVector(KeyTransform('keywords', 'metadata'), weight='B', config='english')
+            + SearchVector('metadata', weight='D', config='english')
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publish', '0016_asset_path_binary_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='version',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='version',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['search_vector'], name='publish_ver_search__5d31da_gin'
+            ),
+        ),
+        migrations.RunPython(populate_search_vector, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 3.0.9 on 2026-10-18 23:30
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publish', '0017_version_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionFacet',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('facet', models.CharField(max_length=32)),
+                ('value', models.CharField(max_length=255)),
+                ('count', models.IntegerField()),
+            ],
+            options={
+                'ordering': ['version', 'facet', '-count'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['metadata'], name='publish_asset_metadata_gin', opclasses=['jsonb_path_ops']
+            ),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='modality',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='session_id',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='species',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(
+                fields=['version', 'species'], name='publish_ass_version_da7acf_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(
+                fields=['version', 'modality'], name='publish_ass_version_e519d0_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(
+                fields=['version', 'session_id'], name='publish_ass_version_6497e7_idx'
+            ),
+        ),
+        # Existing assets are published, so their facets are only extracted once
+        migrations.RunSQL(
+            """
+            UPDATE publish_asset SET
+                species = left(metadata->>'species', 255),
+                modality = left(metadata->>'modality', 255),
+                session_id = left(metadata->>'session_id', 255)
+            """,
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddField(
+            model_name='versionfacet',
+            name='version',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name='facets',
+                to='publish.Version',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='versionfacet',
+            index=models.Index(fields=['facet', 'value'], name='publish_ver_facet_1ac957_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='versionfacet',
+            unique_together={('version', 'facet', 'value')},
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 3.0.9 on 2026-10-18 23:33
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_keywords(apps, schema_editor):
+    Version = apps.get_model('publish', 'Version')  # noqa: N806
+    VersionKeyword = apps.get_model('publish', 'VersionKeyword')  # noqa: N806
+
+    # This must match VersionKeyword.populate at the time of this migration
+    for version in Version.objects.only('metadata').iterator():
+        keywords = version.metadata.get('keywords', [])
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        keywords = {
+            keyword.strip()[:150]
+            for keyword in keywords
+            if isinstance(keyword, str) and keyword.strip()
+        }
+        VersionKeyword.objects.bulk_create(
+            VersionKeyword(version=version, keyword=keyword) for keyword in sorted(keywords)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publish', '0018_asset_facets'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.CreateModel(
+            name='VersionKeyword',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('keyword', models.CharField(max_length=150)),
+            ],
+            options={
+                'ordering': ['version', 'keyword'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='version',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['name'], name='publish_version_name_trgm', opclasses=['gin_trgm_ops']
+            ),
+        ),
+        migrations.AddField(
+            model_name='versionkeyword',
+            name='version',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name='keywords',
+                to='publish.Version',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='versionkeyword',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['keyword'], name='publish_keyword_trgm', opclasses=['gin_trgm_ops']
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name='versionkeyword',
+            unique_together={('version', 'keyword')},
+        ),
+        migrations.RunPython(populate_keywords, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.0.9 on 2026-10-18 23:35
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publish', '0019_version_keywords'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveStats',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('dandiset_count', models.IntegerField(default=0)),
+                ('published_dandiset_count', models.IntegerField(default=0)),
+                ('user_count', models.IntegerField(default=0)),
+                ('size', models.BigIntegerField(default=0)),
+                ('reconciled', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name_plural': 'archive stats',
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.0.9 on 2026-10-18 23:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publish', '0020_archive_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatsSnapshot',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('date', models.DateField(unique=True)),
+                ('dandiset_count', models.IntegerField()),
+                ('published_dandiset_count', models.IntegerField()),
+                ('user_count', models.IntegerField()),
+                ('size', models.BigIntegerField()),
+            ],
+            options={
+                'ordering': ['date'],
+                'get_latest_by': 'date',
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 3.0.9 on 2026-10-18 23:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publish', '0021_stats_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DandisetStorage',
+            fields=[
+                (
+                    'dandiset',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name='storage',
+                        serialize=False,
+                        to='publish.Dandiset',
+                    ),
+                ),
+                ('logical_size', models.BigIntegerField(default=0)),
+                ('unique_size', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'dandiset storage',
+                'ordering': ['dandiset'],
+            },
+        ),
+        migrations.AddField(
+            model_name='archivestats',
+            name='unique_size',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['sha256'], name='publish_ass_sha256_fd624b_idx'),
+        ),
+    ]
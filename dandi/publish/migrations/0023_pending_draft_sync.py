@@ -0,0 +1,29 @@
+# Generated by Django 3.0.9 on 2026-10-18 23:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publish', '0022_storage_accounting'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingDraftSync',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('draft_folder_id', models.CharField(max_length=24, unique=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['created'],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.0.9 on 2026-10-18 23:43
+
+import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def lease_existing_locks(apps, schema_editor):
+    DraftVersion = apps.get_model('publish', 'DraftVersion')  # noqa: N806
+
+    # Give existing locks a full lease, after which they may be reclaimed
+    DraftVersion.objects.exclude(locked_by=None).update(
+        locked_until=timezone.now() + datetime.timedelta(hours=1)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publish', '0023_pending_draft_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='draftversion',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(lease_existing_locks, reverse_code=migrations.RunPython.noop),
+    ]
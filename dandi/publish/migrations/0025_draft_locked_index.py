@@ -0,0 +1,21 @@
+# Generated by Django 3.0.9 on 2026-10-18 23:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publish', '0024_draft_lock_lease'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='draftversion',
+            index=models.Index(
+                condition=models.Q(locked_by__isnull=False),
+                fields=['locked_until'],
+                name='publish_draft_locked_until',
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.0.9 on 2026-10-18 23:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publish', '0025_draft_locked_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='draftversion',
+            name='publish_task_id',
+            field=models.CharField(blank=True, max_length=36),
+        ),
+        migrations.AddField(
+            model_name='draftversion',
+            name='publish_token',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
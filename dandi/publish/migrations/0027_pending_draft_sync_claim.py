@@ -0,0 +1,30 @@
+# Generated by Django 3.0.9 on 2026-10-19 00:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publish', '0026_draft_publish_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DraftSyncSchedule',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('scheduled_until', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='pendingdraftsync',
+            name='claimed',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.0.9 on 2026-10-19 00:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publish', '0027_pending_draft_sync_claim'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchGeneration',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('generation', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
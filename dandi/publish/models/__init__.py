@@ -1,6 +1,26 @@
+from .archive_stats import ArchiveStats
 from .asset import Asset
 from .dandiset import Dandiset
+from .dandiset_storage import DandisetStorage
 from .draft_version import DraftVersion
+from .pending_draft_sync import DraftSyncSchedule, PendingDraftSync
+from .search_generation import SearchGeneration
+from .stats_snapshot import StatsSnapshot
 from .version import Version
+from .version_facet import VersionFacet
+from .version_keyword import VersionKeyword
 
-__all__ = ['Asset', 'Dandiset', 'DraftVersion', 'Version']
+__all__ = [
+    'ArchiveStats',
+    'Asset',
+    'Dandiset',
+    'DandisetStorage',
+    'DraftSyncSchedule',
+    'DraftVersion',
+    'PendingDraftSync',
+    'SearchGeneration',
+    'StatsSnapshot',
+    'Version',
+    'VersionFacet',
+    'VersionKeyword',
+]
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from django.contrib.auth.models import User
+from django.db import models, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .asset import Asset
+from .dandiset import Dandiset
+from .version import Version
+
+
+class ArchiveStats(models.Model):
+    """
+    Statistics of the whole archive, as a single row.
+
+    This is incremented as the archive changes, rather than being computed on each read. Any
+    drift (e.g. from deletions) is corrected by a periodic reconciliation.
+    """
+
+    SINGLETON_PK = 1
+
+    dandiset_count = models.IntegerField(default=0)
+    published_dandiset_count = models.IntegerField(default=0)
+    user_count = models.IntegerField(default=0)
+    size = models.BigIntegerField(default=0)
+    # The size of the distinct blobs (by SHA256) among all assets
+    unique_size = models.BigIntegerField(default=0)
+
+    reconciled = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name_plural = 'archive stats'
+
+    def __str__(self) -> str:
+        return f'Archive stats (reconciled {self.reconciled})'
+
+    @classmethod
+    def get(cls) -> ArchiveStats:
+        """Return the statistics, computing them if they were never computed before."""
+        stats = cls.objects.filter(pk=cls.SINGLETON_PK).first()
+        return stats if stats is not None else cls.reconcile()
+
+    @classmethod
+    def increment(cls, **deltas: int) -> None:
+        """
+        Add to some statistics.
+
+        This should be called within the transaction which makes the change. If the statistics
+        were never computed, this does nothing, as the change will be included once they are.
+        """
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if deltas:
+            cls.objects.filter(pk=cls.SINGLETON_PK).update(
+                **{field: F(field) + delta for field, delta in deltas.items()}
+            )
+
+    @classmethod
+    def reconcile(cls) -> ArchiveStats:
+        """Recompute all statistics from scratch."""
+        with transaction.atomic():
+            cls.objects.get_or_create(pk=cls.SINGLETON_PK)
+            # Concurrent increments are blocked while the row is locked, and ones which
+            # completed before are committed, so they are all counted exactly once
+            stats = cls.objects.select_for_update().get(pk=cls.SINGLETON_PK)
+            stats.dandiset_count = Dandiset.objects.count()
+            stats.published_dandiset_count = Dandiset.published_count()
+            stats.user_count = User.objects.count()
+            # Summing the denormalized Version sizes is much cheaper than summing all assets
+            stats.size = Version.objects.aggregate(size=Sum('size'))['size'] or 0
+            stats.unique_size = Asset.unique_size()
+            stats.reconciled = timezone.now()
+            stats.save()
+        return stats
@@ -3,28 +3,35 @@ from __future__ import annotations
 import hashlib
 import logging
 from tempfile import NamedTemporaryFile
-from typing import List, Set
+from typing import Dict, Iterator, List, Optional, Set
 import uuid
 
 from django.conf import settings
 from django.contrib.postgres.fields import JSONField
+from django.contrib.postgres.indexes import GinIndex
 from django.core.files import File
 from django.core.files.storage import Storage
 from django.core.validators import RegexValidator
 from django.db import models
-from django.db.models import Sum
+from django.db.models import F, Func, Max, Sum
 from django_extensions.db.models import TimeStampedModel
 
 from dandi.publish.girder import GirderClient, GirderFile
-from dandi.publish.storage import DeconstructableFileField, create_s3_storage
+from dandi.publish.storage import DeconstructableFileField, get_s3_storage
 
 from .version import Version
+from .version_facet import VersionFacet
 
 logger = logging.getLogger(__name__)
 
 
+class _BinaryCollation(Func):
+    # Sort by code point, so results match the ordering of Python strings
+    template = '(%(expressions)s) COLLATE "C"'
+
+
 def _get_asset_blob_storage() -> Storage:
-    return create_s3_storage(settings.DANDI_DANDISETS_BUCKET_NAME)
+    return get_s3_storage(settings.DANDI_DANDISETS_BUCKET_NAME)
 
 
 def _get_asset_blob_prefix(instance: Asset, filename: str) -> str:
@@ -44,6 +51,10 @@ class Asset(TimeStampedModel):
     size = models.BigIntegerField()
     sha256 = models.CharField(max_length=64, validators=[RegexValidator(f'^{SHA256_REGEX}$')])
     metadata = JSONField(blank=True, default=dict)
+    # The faceted metadata fields, as stored in VersionFacet; these are maintained upon save
+    species = models.CharField(max_length=VersionFacet.VALUE_MAX_LENGTH, null=True, blank=True)
+    modality = models.CharField(max_length=VersionFacet.VALUE_MAX_LENGTH, null=True, blank=True)
+    session_id = models.CharField(max_length=VersionFacet.VALUE_MAX_LENGTH, null=True, blank=True)
 
     blob = DeconstructableFileField(
         blank=True, storage=_get_asset_blob_storage, upload_to=_get_asset_blob_prefix
@@ -53,6 +64,14 @@ class Asset(TimeStampedModel):
         indexes = [
             models.Index(fields=['uuid']),
             models.Index(fields=['version', 'path']),
+            # Supports finding other assets with the same blob
+            models.Index(fields=['sha256']),
+            # Supports containment queries over metadata
+            GinIndex(
+                fields=['metadata'], opclasses=['jsonb_path_ops'], name='publish_asset_metadata_gin'
+            ),
+            # Support filtering the assets of a version by facet
+            *(models.Index(fields=['version', facet]) for facet in VersionFacet.FACETS),
         ]
         ordering = ['version', 'path']
 
@@ -61,6 +80,15 @@ class Asset(TimeStampedModel):
     def __str__(self) -> str:
         return self.path
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'metadata' in update_fields:
+            for facet in VersionFacet.FACETS:
+                setattr(self, facet, VersionFacet.normalize_value(self.metadata.get(facet)))
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *VersionFacet.FACETS}
+        super().save(*args, **kwargs)
+
     @classmethod
     def from_girder(cls, version: Version, girder_file: GirderFile, client: GirderClient) -> Asset:
         sha256_hasher = hashlib.sha256()
@@ -118,6 +146,54 @@ class Asset(TimeStampedModel):
 
         return sorted(paths)
 
+    @classmethod
+    def diff(cls, old_version: Version, new_version: Version) -> Iterator[Dict[str, str]]:
+        """
+        Yield the assets which were added, removed, or modified between two Versions.
+
+        Both Versions' assets are streamed in path order and merged, so this takes linear time
+        and constant memory in the number of assets.
+        """
+
+        def iter_assets(version: Version) -> Iterator:
+            # This ordering is served by the (version, path COLLATE "C") index
+            return (
+                cls.objects.filter(version=version)
+                .order_by(_BinaryCollation(F('path')))
+                .values_list('path', 'sha256')
+                .iterator()
+            )
+
+        old_assets = iter_assets(old_version)
+        new_assets = iter_assets(new_version)
+        old = next(old_assets, None)
+        new = next(new_assets, None)
+        while old is not None or new is not None:
+            if new is None or (old is not None and old[0] < new[0]):
+                yield {'change': 'removed', 'path': old[0], 'sha256': old[1]}
+                old = next(old_assets, None)
+            elif old is None or new[0] < old[0]:
+                yield {'change': 'added', 'path': new[0], 'sha256': new[1]}
+                new = next(new_assets, None)
+            else:
+                if old[1] != new[1]:
+                    yield {
+                        'change': 'modified',
+                        'path': new[0],
+                        'sha256': new[1],
+                        'old_sha256': old[1],
+                    }
+                old = next(old_assets, None)
+                new = next(new_assets, None)
+
     @classmethod
     def total_size(cls):
         return cls.objects.aggregate(size=Sum('size'))['size'] or 0
+
+    @classmethod
+    def unique_size(cls, assets: Optional[models.QuerySet] = None) -> int:
+        """Return the total size of the distinct blobs (by SHA256) among assets, by default all."""
+        if assets is None:
+            assets = cls.objects.all()
+        blobs = assets.order_by().values('sha256').annotate(blob_size=Max('size'))
+        return blobs.aggregate(size=Sum('blob_size'))['size'] or 0
@@ -1,4 +1,7 @@
+from django.contrib.postgres.lookups import PostgresSimpleLookup
+from django.contrib.postgres.search import TrigramBase
 from django.db import models
+from django.db.models import Value
 
 
 class SelectRelatedManager(models.Manager):
@@ -8,3 +11,28 @@ class SelectRelatedManager(models.Manager):
 
     def get_queryset(self):
         return super().get_queryset().select_related(*self.related_fields)
+
+
+@models.CharField.register_lookup
+class TrigramWordSimilar(PostgresSimpleLookup):
+    """
+    Match values with a word similar to the given string.
+
+    This requires the pg_trgm extension, and is served by a "gin_trgm_ops" index. It is a backport
+    of the lookup of the same name in Django 4.0.
+    """
+
+    lookup_name = 'trigram_word_similar'
+    operator = '%%>'
+
+
+class TrigramWordSimilarity(TrigramBase):
+    """The greatest similarity of a string to any part of a value; a backport from Django 4.0."""
+
+    function = 'WORD_SIMILARITY'
+
+    def __init__(self, string, expression, **extra):
+        # The searched string is the first argument of the SQL function
+        if not hasattr(string, 'resolve_expression'):
+            string = Value(string)
+        super(TrigramBase, self).__init__(string, expression, **extra)
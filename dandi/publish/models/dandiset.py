@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 import logging
-from typing import Optional
+from typing import Dict, List, Optional, Tuple, Union
 
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.core.validators import RegexValidator
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django_extensions.db.models import TimeStampedModel
 
 from dandi.publish.girder import GirderClient, GirderError
@@ -22,6 +23,14 @@ class Dandiset(TimeStampedModel):
         max_length=24, validators=[RegexValidator(f'^{GIRDER_ID_REGEX}$')]
     )
 
+    # Outcomes of syncing a Dandiset from Girder
+    SYNC_CREATED = 'created'
+    SYNC_UPDATED = 'updated'
+    SYNC_UNCHANGED = 'unchanged'
+    SYNC_FAILED = 'failed'
+    # The number of Girder folders fetched at once when syncing many Dandisets
+    SYNC_CONCURRENCY = 8
+
     class Meta:
         ordering = ['id']
 
@@ -48,30 +57,92 @@ class Dandiset(TimeStampedModel):
         """
         Return the Dandiset corresponding to a Girder `draft_folder_id`.
 
-        Creates the Dandiset if it does not exist.
+        Creates the Dandiset if it does not exist, and updates its draft.
+        """
+        dandiset, _ = cls.sync_girder_folder(client.get_folder(draft_folder_id))
+        return dandiset
+
+    @classmethod
+    def sync_girder_folder(cls, draft_folder: Dict) -> Tuple[Dandiset, str]:
+        """
+        Create or update a Dandiset and its draft from a Girder draft folder.
+
+        Returns the Dandiset, and whether it was "created", "updated" or "unchanged".
         """
-        draft_folder = client.get_folder(draft_folder_id)
+        # Prevent circular import
+        from .draft_version import DraftVersion
 
+        draft_folder_id = draft_folder['_id']
         dandiset_identifier = draft_folder['name']
         try:
             dandiset_id = int(dandiset_identifier)
         except ValueError:
             raise GirderError(f'Invalid Dandiset identifier in Girder: {dandiset_identifier}')
-        try:
-            dandiset = Dandiset.objects.get(id=dandiset_id)
-        except ObjectDoesNotExist:
-            dandiset = Dandiset(id=dandiset_id, draft_folder_id=draft_folder_id)
-            dandiset.save()
-            from .draft_version import DraftVersion
 
-            draft = DraftVersion.from_girder_metadata(dandiset, draft_folder['meta'])
-            draft.full_clean()
-            draft.save()
-        else:
+        with transaction.atomic():
+            try:
+                dandiset = Dandiset.objects.select_related('draft_version').get(id=dandiset_id)
+            except ObjectDoesNotExist:
+                dandiset = Dandiset(id=dandiset_id, draft_folder_id=draft_folder_id)
+                dandiset.save()
+
+                draft = DraftVersion.from_girder_metadata(dandiset, draft_folder['meta'])
+                draft.full_clean()
+                draft.save()
+                return dandiset, cls.SYNC_CREATED
+
             # If the Dandiset existed, sync the draft_folder_id
             if dandiset.draft_folder_id != draft_folder_id:
                 raise GirderError(
                     f'Known Dandiset identifer {dandiset.identifier} does not'
                     f'match existing Girder folder id {dandiset.draft_folder_id}'
                 )
-        return dandiset
+
+            draft = DraftVersion.from_girder_metadata(dandiset, draft_folder['meta'])
+            current_draft = dandiset.draft_version
+            if (draft.name, draft.metadata) == (current_draft.name, current_draft.metadata):
+                return dandiset, cls.SYNC_UNCHANGED
+            current_draft.name = draft.name
+            current_draft.metadata = draft.metadata
+            current_draft.full_clean()
+            current_draft.save(update_fields=['name', 'metadata', 'modified'])
+            return dandiset, cls.SYNC_UPDATED
+
+    @classmethod
+    def sync_from_girder(cls, draft_folder_ids: List[str], client: GirderClient) -> Dict[str, str]:
+        """
+        Sync many Dandisets from their Girder draft folders.
+
+        The folders are fetched concurrently, as this is mostly spent waiting on Girder. Returns
+        the outcome of each folder id; if one fails to sync, it is "failed" and the rest proceed.
+        """
+
+        def get_folder(draft_folder_id: str) -> Union[Dict, Exception]:
+            try:
+                return client.get_folder(draft_folder_id)
+            except Exception as e:
+                # Any failure to fetch a folder, e.g. a timeout or an invalid response, only fails
+                # that folder; raising it would abort the whole batch
+                return e
+
+        outcomes = {}
+        with ThreadPoolExecutor(max_workers=cls.SYNC_CONCURRENCY) as executor:
+            # Database writes remain in this thread, in the order of the folder ids
+            for draft_folder_id, draft_folder in zip(
+                draft_folder_ids, executor.map(get_folder, draft_folder_ids)
+            ):
+                try:
+                    if isinstance(draft_folder, Exception):
+                        raise GirderError(f'Failed to fetch the folder: {draft_folder!r}')
+                    _, outcomes[draft_folder_id] = cls.sync_girder_folder(draft_folder)
+                # An IntegrityError may come from a concurrent sync creating the same Dandiset
+                except (GirderError, KeyError, ValidationError, IntegrityError) as e:
+                    logger.warning(f'Failed to sync Girder draft folder {draft_folder_id}: {e}')
+                    outcomes[draft_folder_id] = cls.SYNC_FAILED
+        return outcomes
+
+    @classmethod
+    def reconcile_girder(cls, client: GirderClient) -> Dict[str, str]:
+        """Sync every draft folder in Girder, returning the outcome of each folder id."""
+        draft_folder_ids = [folder['_id'] for folder in client.get_draft_folders()]
+        return cls.sync_from_girder(draft_folder_ids, client)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from django.db import models, transaction
+from django.db.models import F, Sum
+
+from .archive_stats import ArchiveStats
+from .asset import Asset
+from .dandiset import Dandiset
+from .version import Version
+
+
+class DandisetStorage(models.Model):
+    """
+    The storage used by all Versions of a Dandiset.
+
+    The logical size counts every asset of every Version, while the unique size counts each
+    distinct blob (by SHA256) once, regardless of how many assets share it.
+    """
+
+    dandiset = models.OneToOneField(
+        Dandiset, related_name='storage', primary_key=True, on_delete=models.CASCADE
+    )
+    logical_size = models.BigIntegerField(default=0)
+    unique_size = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'dandiset storage'
+        ordering = ['dandiset']
+
+    def __str__(self) -> str:
+        return str(self.dandiset)
+
+    @property
+    def duplicate_size(self) -> int:
+        return self.logical_size - self.unique_size
+
+    @classmethod
+    def add_version(cls, version: Version) -> None:
+        """
+        Account for the assets of a newly published Version.
+
+        The Dandiset is counted as published if this is its first Version. Only the blobs not
+        already in an earlier Version are added to the unique sizes, so this must be called exactly
+        once per Version, after its asset statistics are updated. It should be called within the
+        transaction which creates the Version's assets.
+        """
+        with transaction.atomic():
+            # Concurrent publishes of other Dandisets may add the same blobs, so they are
+            # serialized on the archive statistics until they commit. Each then sees the assets of
+            # those before it, and only one counts a shared blob as new.
+            ArchiveStats.objects.select_for_update().filter(pk=ArchiveStats.SINGLETON_PK).first()
+
+            other_assets = Asset.objects.exclude(version=version)
+            dandiset_unique_size = Asset.unique_size(
+                version.assets.exclude(
+                    sha256__in=other_assets.filter(version__dandiset=version.dandiset_id).values(
+                        'sha256'
+                    )
+                )
+            )
+            archive_unique_size = Asset.unique_size(
+                version.assets.exclude(sha256__in=other_assets.values('sha256'))
+            )
+
+            # Publishes of the same Dandiset are serialized by its draft lock, so only one can be
+            # the first
+            first_version = (
+                not Version.objects.filter(dandiset=version.dandiset_id)
+                .exclude(pk=version.pk)
+                .exists()
+            )
+
+            cls.objects.get_or_create(dandiset_id=version.dandiset_id)
+            cls.objects.filter(dandiset_id=version.dandiset_id).update(
+                logical_size=F('logical_size') + version.size,
+                unique_size=F('unique_size') + dandiset_unique_size,
+            )
+            ArchiveStats.increment(
+                unique_size=archive_unique_size, published_dandiset_count=int(first_version)
+            )
+
+    @classmethod
+    def reconcile(cls, dandiset: Dandiset) -> DandisetStorage:
+        """Recompute the storage of a Dandiset from scratch."""
+        assets = Asset.objects.filter(version__dandiset=dandiset)
+        storage, _ = cls.objects.update_or_create(
+            dandiset=dandiset,
+            defaults={
+                'logical_size': assets.aggregate(size=Sum('size'))['size'] or 0,
+                'unique_size': Asset.unique_size(assets),
+            },
+        )
+        return storage
@@ -1,52 +1,307 @@
-from django.contrib.auth.models import User
+from __future__ import annotations
+
+import contextlib
+import datetime
+import hashlib
+import json
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import uuid
+
+from django.contrib.auth.models import Permission, User
+from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
-from django.db import models
-from guardian.shortcuts import assign_perm, get_users_with_perms, remove_perm
+from django.db import connection, models, transaction
+from django.db.models import Q
+from django.db.models.functions import Cast
+from django.utils import timezone
+from guardian.models import UserObjectPermission
 
 from .dandiset import Dandiset
 from .version import BaseVersion
 
 
 class DraftVersion(BaseVersion):
+    # The duration of a lock, e.g. for an upload
+    LOCK_LEASE = datetime.timedelta(hours=1)
+    # The duration of a lock held by a publish, which renews it while running
+    PUBLISH_LOCK_LEASE = datetime.timedelta(minutes=5)
+    # The duration of a lock held by a publish which is queued, as it's only renewed once running.
+    # This covers a long queue of publishes; a publish whose task is lost may be unlocked sooner.
+    PUBLISH_QUEUED_LOCK_LEASE = datetime.timedelta(days=1)
+
     dandiset = models.OneToOneField(
         Dandiset, related_name='draft_version', on_delete=models.CASCADE, primary_key=True
     )
     locked_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    # A lock is only held until this time, unless it's renewed
+    locked_until = models.DateTimeField(null=True, blank=True)
+    # While a publish holds the lock, these identify the request and the task which publishes it
+    publish_token = models.CharField(max_length=64, blank=True)
+    publish_task_id = models.CharField(max_length=36, blank=True)
 
     class Meta(BaseVersion.Meta):
         indexes = [
             models.Index(fields=['dandiset']),
+            # Few drafts are locked at any time, so listing and releasing them only scans these
+            models.Index(
+                fields=['locked_until'],
+                name='publish_draft_locked_until',
+                condition=Q(locked_by__isnull=False),
+            ),
         ]
         permissions = [('owner', 'Owns the draft version')]
 
+    @classmethod
+    def _owner_permissions(cls) -> models.QuerySet:
+        # Owners are only ever granted permissions as users, never through groups
+        return UserObjectPermission.objects.filter(
+            content_type=ContentType.objects.get_for_model(cls), permission__codename='owner'
+        )
+
+    @classmethod
+    def get_owners_many(cls, pks: Iterable) -> Dict[int, List[User]]:
+        """Return the owners of many drafts, by a single query."""
+        pks = {str(pk): pk for pk in pks}
+        owners = {pk: [] for pk in pks.values()}
+        if pks:
+            permissions = (
+                cls._owner_permissions()
+                .filter(object_pk__in=pks)
+                .select_related('user')
+                .order_by('user_id')
+            )
+            for permission in permissions:
+                owners[pks[permission.object_pk]].append(permission.user)
+        return owners
+
+    @classmethod
+    def prefetch_owners(cls, draft_versions: Iterable[DraftVersion]) -> None:
+        """Attach the owners of many drafts, so serializing them doesn't query each one."""
+        draft_versions = list(draft_versions)
+        owners = cls.get_owners_many([draft_version.pk for draft_version in draft_versions])
+        for draft_version in draft_versions:
+            draft_version._prefetched_owners = owners[draft_version.pk]
+
     @property
-    def owners(self):
-        return get_users_with_perms(self, only_with_perms_in=['owner'])
+    def owners(self) -> List[User]:
+        if hasattr(self, '_prefetched_owners'):
+            return self._prefetched_owners
+        return DraftVersion.get_owners_many([self.pk])[self.pk]
 
     def set_owners(self, new_owners):
-        old_owners = get_users_with_perms(self, only_with_perms_in=['owner'])
+        owner_permissions = DraftVersion._owner_permissions().filter(object_pk=str(self.pk))
+        new_owners = {new_owner.id: new_owner for new_owner in new_owners}
 
-        # Remove old owners
-        for old_owner in old_owners:
-            if old_owner not in new_owners:
-                remove_perm('owner', old_owner, self)
-        # Add new owners
-        for new_owner in new_owners:
-            if new_owner not in old_owners:
-                assign_perm('owner', new_owner, self)
+        with transaction.atomic():
+            old_owner_ids = set(owner_permissions.values_list('user_id', flat=True))
+            # Remove old owners
+            owner_permissions.exclude(user_id__in=new_owners).delete()
+            # Add new owners
+            if new_owners.keys() - old_owner_ids:
+                permission = Permission.objects.get(
+                    content_type=ContentType.objects.get_for_model(DraftVersion),
+                    codename='owner',
+                )
+                UserObjectPermission.objects.bulk_create(
+                    [
+                        UserObjectPermission(
+                            content_type=permission.content_type,
+                            permission=permission,
+                            object_pk=str(self.pk),
+                            user=new_owner,
+                        )
+                        for new_owner_id, new_owner in new_owners.items()
+                        if new_owner_id not in old_owner_ids
+                    ],
+                    # Another concurrent change may have added the same owner
+                    ignore_conflicts=True,
+                )
+
+            # Owners are part of the draft's representation, so it has been modified
+            self.save(update_fields=['modified'])
+        if hasattr(self, '_prefetched_owners'):
+            del self._prefetched_owners
+
+    @classmethod
+    def owned_by(cls, username: str) -> Q:
+        """Return a condition on the drafts owned by a user, without checking each draft."""
+        # The object primary keys are stored as text; the permissions of a user are found through
+        # the (user, permission, object_pk) unique index
+        draft_pks = (
+            cls._owner_permissions()
+            .filter(user__username=username)
+            .annotate(draft_pk=Cast('object_pk', models.IntegerField()))
+            .values('draft_pk')
+        )
+        return Q(pk__in=draft_pks)
+
+    @classmethod
+    def locked_condition(cls) -> Q:
+        """Return a condition on the drafts which are currently locked, like the locked property."""
+        return Q(locked_by__isnull=False) & (
+            Q(locked_until=None) | Q(locked_until__gt=timezone.now())
+        )
 
     @property
-    def locked(self):
-        return self.locked_by is not None
+    def locked(self) -> bool:
+        return self.locked_by is not None and (
+            self.locked_until is None or self.locked_until > timezone.now()
+        )
 
-    def lock(self, user: User):
-        if self.locked:
+    def lock(
+        self,
+        user: User,
+        lease: datetime.timedelta = LOCK_LEASE,
+        publish_token: str = '',
+        publish_task_id: str = '',
+    ):
+        """
+        Lock the draft for a user, until the lease expires.
+
+        This is atomic, so only one of many concurrent calls can succeed. A lock whose lease has
+        expired is reclaimed.
+        """
+        now = timezone.now()
+        locked_until = now + lease
+        acquired = (
+            DraftVersion.objects.filter(pk=self.pk)
+            .filter(Q(locked_by=None) | Q(locked_until__lte=now))
+            .update(
+                locked_by=user,
+                locked_until=locked_until,
+                publish_token=publish_token,
+                publish_task_id=publish_task_id,
+                modified=now,
+            )
+        )
+        if not acquired:
             raise ValidationError('Draft is locked')
         self.locked_by = user
+        self.locked_until = locked_until
+        self.publish_token = publish_token
+        self.publish_task_id = publish_task_id
+        self.modified = now
+
+    def publish_state_token(self) -> str:
+        """Return a token of the published content, identifying repeated requests to publish it."""
+        state = json.dumps({'name': self.name, 'metadata': self.metadata}, sort_keys=True)
+        return hashlib.sha256(state.encode()).hexdigest()
 
-    def unlock(self, user: User):
-        if not self.locked:
-            raise ValidationError('Cannot unlock a draft that is not locked')
-        if self.locked_by != user:
+    def lock_for_publish(self, user: User, publish_token: str) -> Tuple[str, bool]:
+        """
+        Lock the draft for a new publish task, returning its id and whether it's new.
+
+        If the same user's publish with the same token is already in progress, its task id is
+        returned instead, so a repeated request doesn't start another publish.
+        """
+        task_id = str(uuid.uuid4())
+        try:
+            self.lock(
+                user,
+                lease=DraftVersion.PUBLISH_QUEUED_LOCK_LEASE,
+                publish_token=publish_token,
+                publish_task_id=task_id,
+            )
+        except ValidationError:
+            in_progress_task_id = (
+                DraftVersion.objects.filter(
+                    DraftVersion.locked_condition(),
+                    pk=self.pk,
+                    locked_by=user,
+                    publish_token=publish_token,
+                )
+                .exclude(publish_task_id='')
+                .values_list('publish_task_id', flat=True)
+                .first()
+            )
+            if in_progress_task_id is None:
+                raise
+            return in_progress_task_id, False
+        return task_id, True
+
+    def _held_by(self, user: User, publish_task_id: Optional[str]) -> models.QuerySet:
+        held = DraftVersion.objects.filter(pk=self.pk, locked_by=user)
+        if publish_task_id is not None:
+            # Only the publish which took the lock may keep it, not an earlier one of the same user
+            held = held.filter(publish_task_id=publish_task_id)
+        return held
+
+    def renew_lock(
+        self,
+        user: User,
+        lease: datetime.timedelta = LOCK_LEASE,
+        publish_task_id: Optional[str] = None,
+    ) -> bool:
+        """
+        Extend the lease of a user's lock, returning whether the user still held it.
+
+        If publish_task_id is given, the lock must also be held by that publish task.
+        """
+        locked_until = timezone.now() + lease
+        renewed = self._held_by(user, publish_task_id).update(locked_until=locked_until)
+        if renewed:
+            self.locked_until = locked_until
+        return bool(renewed)
+
+    @contextlib.contextmanager
+    def hold_lock(
+        self,
+        user: User,
+        lease: datetime.timedelta,
+        publish_task_id: Optional[str] = None,
+        interval: Optional[float] = None,
+    ) -> Iterator[threading.Event]:
+        """
+        Keep renewing a user's lock in a background thread, while the context is active.
+
+        The lease is renewed well before it expires, so a lock is only lost if its holder stops
+        (e.g. a crashed worker). The yielded event is set if the lock is lost anyway.
+        """
+        if interval is None:
+            interval = lease.total_seconds() / 3
+        stopped = threading.Event()
+        lost = threading.Event()
+
+        def heartbeat():
+            try:
+                while not stopped.wait(interval):
+                    if not self.renew_lock(user, lease, publish_task_id):
+                        lost.set()
+                        return
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=heartbeat, daemon=True)
+        thread.start()
+        try:
+            yield lost
+        finally:
+            stopped.set()
+            thread.join()
+
+    def unlock(self, user: User, publish_task_id: Optional[str] = None):
+        now = timezone.now()
+        released = self._held_by(user, publish_task_id).update(
+            locked_by=None, locked_until=None, publish_token='', publish_task_id='', modified=now
+        )
+        if not released:
+            self.refresh_from_db(fields=['locked_by', 'locked_until', 'publish_task_id'])
+            if not self.locked:
+                raise ValidationError('Cannot unlock a draft that is not locked')
+            if publish_task_id is not None and self.locked_by == user:
+                raise ValidationError('Cannot unlock a draft locked by another publish')
             raise ValidationError('Cannot unlock a draft locked by another user')
         self.locked_by = None
+        self.locked_until = None
+        self.publish_token = ''
+        self.publish_task_id = ''
+        self.modified = now
+
+    @classmethod
+    def release_expired_locks(cls) -> int:
+        """Release all locks whose lease has expired, returning how many there were."""
+        now = timezone.now()
+        return cls.objects.filter(locked_until__lte=now).update(
+            locked_by=None, locked_until=None, publish_token='', publish_task_id='', modified=now
+        )
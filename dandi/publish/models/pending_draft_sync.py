@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import contextlib
+import datetime
+from typing import Iterator, List
+
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+
+class PendingDraftSync(models.Model):
+    """A Girder draft folder which changed, and whose draft should be synced."""
+
+    draft_folder_id = models.CharField(max_length=24, unique=True)
+    created = models.DateTimeField(auto_now_add=True)
+    # While a sync is in progress, the time at which it claimed this folder
+    claimed = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created']
+
+    def __str__(self) -> str:
+        return self.draft_folder_id
+
+    @classmethod
+    def add(cls, draft_folder_ids: List[str]) -> None:
+        # A folder which is already pending only needs to be synced once
+        cls.objects.bulk_create(
+            [cls(draft_folder_id=draft_folder_id) for draft_folder_id in draft_folder_ids],
+            ignore_conflicts=True,
+        )
+        # A folder which changed again while being synced must be synced again
+        cls.objects.filter(draft_folder_id__in=draft_folder_ids, claimed__isnull=False).update(
+            claimed=None
+        )
+
+    @classmethod
+    @contextlib.contextmanager
+    def claim(cls, stale_after: datetime.timedelta) -> Iterator[List[str]]:
+        """
+        Claim all pending folder ids to sync, except those claimed concurrently.
+
+        The claimed folders are removed once the context exits, unless they changed again in the
+        meantime, or were released. If the context raises, they all remain pending. If the sync is
+        killed, they may be claimed again after stale_after.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            draft_folder_ids = list(
+                cls.objects.select_for_update(skip_locked=True)
+                .filter(Q(claimed=None) | Q(claimed__lt=now - stale_after))
+                .values_list('draft_folder_id', flat=True)
+            )
+            cls.objects.filter(draft_folder_id__in=draft_folder_ids).update(claimed=now)
+
+        claimed = cls.objects.filter(draft_folder_id__in=draft_folder_ids, claimed=now)
+        try:
+            yield draft_folder_ids
+        except BaseException:
+            claimed.update(claimed=None)
+            raise
+        claimed.delete()
+
+    @classmethod
+    def release(cls, draft_folder_ids: List[str]) -> None:
+        """Keep some claimed folder ids pending, to be synced again by the next sync."""
+        cls.objects.filter(draft_folder_id__in=draft_folder_ids).update(claimed=None)
+
+
+class DraftSyncSchedule(models.Model):
+    """Whether a sync of the pending drafts is scheduled; there is only one of these."""
+
+    # A sync is scheduled until it starts, or until this time, in case it was lost
+    scheduled_until = models.DateTimeField(null=True, blank=True)
+
+    @classmethod
+    def schedule(cls, timeout: datetime.timedelta) -> bool:
+        """Mark a sync as scheduled, returning whether it wasn't already, so it must be enqueued."""
+        now = timezone.now()
+        cls.objects.bulk_create([cls(pk=1)], ignore_conflicts=True)
+        return bool(
+            cls.objects.filter(pk=1)
+            .filter(Q(scheduled_until=None) | Q(scheduled_until__lte=now))
+            .update(scheduled_until=now + timeout)
+        )
+
+    @classmethod
+    def clear(cls) -> None:
+        cls.objects.filter(pk=1).update(scheduled_until=None)
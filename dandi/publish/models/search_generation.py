@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from django.db import models
+from django.db.models import F
+
+
+class SearchGeneration(models.Model):
+    """
+    The generation of the search results, as a single row.
+
+    This is bumped whenever a publish commits, so results cached by any process for an earlier
+    generation are no longer used. It's read by primary key for every search.
+    """
+
+    SINGLETON_PK = 1
+
+    generation = models.BigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f'Search generation {self.generation}'
+
+    @classmethod
+    def get(cls) -> int:
+        generation = (
+            cls.objects.filter(pk=cls.SINGLETON_PK).values_list('generation', flat=True).first()
+        )
+        return generation or 0
+
+    @classmethod
+    def bump(cls) -> None:
+        cls.objects.bulk_create([cls(pk=cls.SINGLETON_PK)], ignore_conflicts=True)
+        cls.objects.filter(pk=cls.SINGLETON_PK).update(generation=F('generation') + 1)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from django.db import models
+from django.utils import timezone
+
+from .archive_stats import ArchiveStats
+
+
+class StatsSnapshot(models.Model):
+    """The archive statistics at the end of a day."""
+
+    date = models.DateField(unique=True)
+
+    dandiset_count = models.IntegerField()
+    published_dandiset_count = models.IntegerField()
+    user_count = models.IntegerField()
+    size = models.BigIntegerField()
+
+    class Meta:
+        ordering = ['date']
+        get_latest_by = 'date'
+
+    def __str__(self) -> str:
+        return str(self.date)
+
+    @classmethod
+    def record(cls) -> StatsSnapshot:
+        """
+        Record the current statistics as the snapshot of today.
+
+        This is called periodically throughout the day, so the last call records its final state.
+        """
+        stats = ArchiveStats.get()
+        snapshot, _ = cls.objects.update_or_create(
+            date=timezone.localdate(),
+            defaults={
+                'dandiset_count': stats.dandiset_count,
+                'published_dandiset_count': stats.published_dandiset_count,
+                'user_count': stats.user_count,
+                'size': stats.size,
+            },
+        )
+        return snapshot
@@ -5,9 +5,13 @@ import logging
 from typing import Dict
 
 from django.contrib.postgres.fields import JSONField
+from django.contrib.postgres.fields.jsonb import KeyTextTransform, KeyTransform
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models.functions import Cast, LPad
 from django_extensions.db.models import TimeStampedModel
 
 from dandi.publish.girder import GirderClient
@@ -49,25 +53,40 @@ class BaseVersion(TimeStampedModel):
 
 
 def _get_default_version() -> str:
-    # This cannot be a lambda, as migrations cannot serialize those
-    return Version.make_version()
+    # This is only referenced by historical migrations; new versions are allocated upon save
+    return Version.datetime_to_version(datetime.datetime.utcnow())
 
 
 class Version(BaseVersion):
     VERSION_REGEX = r'0\.\d{6}\.\d{4}'
+    VERSION_FORMAT = '0.%y%m%d.%H%M'
+    # The first key of the advisory lock held while allocating a version for a Dandiset
+    ADVISORY_LOCK_NAMESPACE = 1
+    SEARCH_CONFIG = 'english'
 
     dandiset = models.ForeignKey(Dandiset, related_name='versions', on_delete=models.CASCADE)
     version = models.CharField(
         max_length=13,
         validators=[RegexValidator(f'^{VERSION_REGEX}$')],
-        default=_get_default_version,
+        # If left blank, this is allocated upon save
+        blank=True,
     )  # TODO: rename this?
 
+    # Assets are only added at publish time and published Versions are immutable, so these are
+    # denormalized from the assets once, by update_asset_stats
+    assets_count = models.IntegerField(default=0)
+    size = models.BigIntegerField(default=0)
+
+    # This (and the keywords) are maintained upon save, from search_document
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta(BaseVersion.Meta):
         unique_together = [['dandiset', 'version']]
         ordering = ['dandiset', '-version']
         indexes = [
             models.Index(fields=['dandiset', 'version']),
+            GinIndex(fields=['search_vector']),
+            GinIndex(fields=['name'], name='publish_version_name_trgm', opclasses=['gin_trgm_ops']),
         ]
 
     # Define custom "objects" first, so it will be the "_default_manager", which is more efficient
@@ -77,34 +96,80 @@ class Version(BaseVersion):
     def __str__(self) -> str:
         return f'{self.dandiset.identifier}: {self.version}'
 
-    @property
-    def assets_count(self):
-        return self.assets.count()
+    def update_asset_stats(self) -> None:
+        """Recompute the denormalized statistics of this Version's assets."""
+        # Prevent circular import
+        from .archive_stats import ArchiveStats
+
+        previous_size = self.size
+        stats = self.assets.aggregate(assets_count=models.Count('id'), size=models.Sum('size'))
+        self.assets_count = stats['assets_count']
+        self.size = stats['size'] or 0
+        self.save(update_fields=['assets_count', 'size'])
+        ArchiveStats.increment(size=self.size - previous_size)
+
+    @classmethod
+    def search_document(cls) -> SearchVector:
+        """Return an expression for the weighted search vector of a Version row."""
+        return (
+            SearchVector('name', weight='A', config=cls.SEARCH_CONFIG)
+            + SearchVector(
+                LPad(Cast('dandiset_id', models.TextField()), 6, models.Value('0')),
+                weight='A',
+                config=cls.SEARCH_CONFIG,
+            )
+            + SearchVector(
+                KeyTextTransform('description', 'metadata'), weight='B', config=cls.SEARCH_CONFIG
+            )
+            + SearchVector(
+                KeyTransform('keywords', 'metadata'), weight='B', config=cls.SEARCH_CONFIG
+            )
+            + SearchVector('metadata', weight='D', config=cls.SEARCH_CONFIG)
+        )
 
-    @property
-    def size(self):
-        size = self.assets.aggregate(total_size=models.Sum('size'))['total_size']
-        if size is None:
-            return 0
-        return size
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic():
+            if not self.version:
+                self.version = Version.make_version(self.dandiset)
+            super().save(*args, **kwargs)
 
-    @staticmethod
-    def datetime_to_version(time: datetime.datetime) -> str:
-        return time.strftime('0.%y%m%d.%H%M')
+            if update_fields is None or {'name', 'metadata'} & set(update_fields):
+                Version.objects.filter(pk=self.pk).update(search_vector=Version.search_document())
+                # Prevent circular import
+                from .version_keyword import VersionKeyword
+
+                VersionKeyword.populate(self)
+
+    @classmethod
+    def datetime_to_version(cls, time: datetime.datetime) -> str:
+        return time.strftime(cls.VERSION_FORMAT)
 
     @classmethod
-    def make_version(cls, dandiset: Dandiset = None) -> str:
-        versions: models.Manager = dandiset.versions if dandiset else cls.objects
-
-        time = datetime.datetime.utcnow()
-        # increment time until there are no collisions
-        while True:
-            version = cls.datetime_to_version(time)
-            collision = versions.filter(version=version).exists()
-            if not collision:
-                break
-            time += datetime.timedelta(minutes=1)
+    def version_to_datetime(cls, version: str) -> datetime.datetime:
+        return datetime.datetime.strptime(version, cls.VERSION_FORMAT)
 
+    @classmethod
+    def make_version(cls, dandiset: Dandiset) -> str:
+        """
+        Allocate a new version string for a Dandiset.
+
+        The version is based on the current time, but always sorts after any existing version of
+        the Dandiset. This should be called within the transaction which saves the new Version,
+        as concurrent allocations for the same Dandiset are serialized until it ends.
+        """
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_advisory_xact_lock(%s, %s)', [cls.ADVISORY_LOCK_NAMESPACE, dandiset.id]
+            )
+            latest = dandiset.versions.aggregate(latest=models.Max('version'))['latest']
+
+        version = cls.datetime_to_version(datetime.datetime.utcnow())
+        if latest is not None and latest >= version:
+            # Version strings sort chronologically, so step past the latest one
+            version = cls.datetime_to_version(
+                cls.version_to_datetime(latest) + datetime.timedelta(minutes=1)
+            )
         return version
 
     @classmethod
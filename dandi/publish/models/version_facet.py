@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Optional
+
+from django.db import models
+
+from .version import Version
+
+
+class VersionFacet(models.Model):
+    """The number of assets in a Version with some value of a faceted metadata field."""
+
+    # Asset metadata fields which are faceted
+    FACETS = ['species', 'modality', 'session_id']
+    VALUE_MAX_LENGTH = 255
+
+    version = models.ForeignKey(Version, related_name='facets', on_delete=models.CASCADE)
+    facet = models.CharField(max_length=32)
+    value = models.CharField(max_length=VALUE_MAX_LENGTH)
+    count = models.IntegerField()
+
+    class Meta:
+        unique_together = [['version', 'facet', 'value']]
+        indexes = [
+            models.Index(fields=['facet', 'value']),
+        ]
+        ordering = ['version', 'facet', '-count']
+
+    def __str__(self) -> str:
+        return f'{self.version}: {self.facet}={self.value} ({self.count})'
+
+    @classmethod
+    def normalize_value(cls, value: Any) -> Optional[str]:
+        """
+        Return a facet value from asset metadata or from a client, as stored in VersionFacet.
+
+        Values of any JSON type are represented as text, e.g. a numeric session_id, and truncated.
+        """
+        if value is None:
+            return None
+        if not isinstance(value, str):
+            value = json.dumps(value)
+        return value[: cls.VALUE_MAX_LENGTH]
+
+    @classmethod
+    def populate(cls, version: Version) -> None:
+        """
+        Count the values of every facet among a Version's assets.
+
+        This is done once at publish time, so faceted searches never aggregate over assets.
+        """
+        cls.objects.filter(version=version).delete()
+        for facet in cls.FACETS:
+            value_counts = (
+                version.assets.exclude(**{facet: None})
+                .order_by()
+                .values(facet)
+                .annotate(count=models.Count('id'))
+            )
+            cls.objects.bulk_create(
+                cls(version=version, facet=facet, value=row[facet], count=row['count'])
+                for row in value_counts
+            )
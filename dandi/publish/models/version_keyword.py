@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from django.contrib.postgres.indexes import GinIndex
+from django.db import models
+
+from .version import Version
+
+
+class VersionKeyword(models.Model):
+    """A keyword of a Version, extracted from its metadata for typeahead suggestions."""
+
+    KEYWORD_MAX_LENGTH = 150
+
+    version = models.ForeignKey(Version, related_name='keywords', on_delete=models.CASCADE)
+    keyword = models.CharField(max_length=KEYWORD_MAX_LENGTH)
+
+    class Meta:
+        unique_together = [['version', 'keyword']]
+        indexes = [
+            GinIndex(fields=['keyword'], name='publish_keyword_trgm', opclasses=['gin_trgm_ops']),
+        ]
+        ordering = ['version', 'keyword']
+
+    def __str__(self) -> str:
+        return f'{self.version}: {self.keyword}'
+
+    @classmethod
+    def populate(cls, version: Version) -> None:
+        """Extract the keywords of a Version from its metadata."""
+        cls.objects.filter(version=version).delete()
+        keywords = version.metadata.get('keywords', [])
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        keywords = {
+            keyword.strip()[: cls.KEYWORD_MAX_LENGTH]
+            for keyword in keywords
+            if isinstance(keyword, str) and keyword.strip()
+        }
+        cls.objects.bulk_create(
+            cls(version=version, keyword=keyword) for keyword in sorted(keywords)
+        )
@@ -0,0 +1,83 @@
+"""
+The OpenAPI schema of the API, which is generated once per process and served with an ETag.
+
+Generating the schema introspects every view and serializer, and it only changes with the code,
+so it's rendered upon the first request for each base URL and format, then kept in memory. It may
+also be pre-rendered to a file, by the "render_openapi_schema" management command, and served
+from there by setting DANDI_OPENAPI_SCHEMA_FILE.
+"""
+
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from drf_yasg import openapi
+from drf_yasg.generators import OpenAPISchemaGenerator
+from drf_yasg.renderers import OpenAPIRenderer, _SpecRenderer
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+
+# Clients must revalidate the schema, as it changes upon deploys, which is cheap with the ETag
+SCHEMA_MAX_AGE = 0
+
+info = openapi.Info(
+    title='DANDI Archive',
+    default_version='v1',
+    description='The BRAIN Initiative archive for publishing and sharing '
+    'cellular neurophysiology data',
+)
+
+# The rendered schema and its ETag, by base URL and format
+_rendered_schemas: Dict[Tuple[Optional[str], str], Tuple[bytes, str]] = {}
+_rendered_schemas_lock = threading.Lock()
+
+
+def render_schema(url: Optional[str] = None, request=None) -> bytes:
+    """Render the public schema as JSON, for a base URL or else for the URL of a request."""
+    schema = OpenAPISchemaGenerator(info, url=url).get_schema(request=request, public=True)
+    return OpenAPIRenderer().render(schema)
+
+
+def _rendered(key: Tuple[Optional[str], str], render) -> Tuple[bytes, str]:
+    rendered = _rendered_schemas.get(key)
+    if rendered is None:
+        # Concurrent first requests wait for a single rendering
+        with _rendered_schemas_lock:
+            rendered = _rendered_schemas.get(key)
+            if rendered is None:
+                content = render()
+                rendered = (content, hashlib.sha256(content).hexdigest())
+                _rendered_schemas[key] = rendered
+    return rendered
+
+
+class SchemaView(get_schema_view(info, public=True, permission_classes=(permissions.AllowAny,))):
+    def get(self, request, version='', format=None):
+        renderer = request.accepted_renderer
+        if not isinstance(renderer, _SpecRenderer):
+            # The UI pages only embed the URL of the schema, so they are cheap
+            return super().get(request, version, format)
+
+        if settings.DANDI_OPENAPI_SCHEMA_FILE and renderer.format == OpenAPIRenderer.format:
+            key = (None, renderer.format)
+
+            def render():
+                with open(settings.DANDI_OPENAPI_SCHEMA_FILE, 'rb') as schema_file:
+                    return schema_file.read()
+
+        else:
+            key = (request.build_absolute_uri('/'), renderer.format)
+
+            def render():
+                schema = super(SchemaView, self).get(request, version, format).data
+                return renderer.render(schema)
+
+        content, etag = _rendered(key, render)
+        response = HttpResponse(content, content_type=f'{renderer.media_type}; charset=utf-8')
+        response['ETag'] = quote_etag(etag)
+        patch_cache_control(response, public=True, max_age=SCHEMA_MAX_AGE)
+        return get_conditional_response(request, etag=response['ETag'], response=response)
@@ -0,0 +1,68 @@
+"""
+Accounting of the work done while serving a request: database queries, cache hits and storage calls.
+
+The accounting of the current request is only active while RequestTimingMiddleware is enabled;
+otherwise, recording anything is a no-op.
+"""
+
+from __future__ import annotations
+
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+import time
+from typing import Optional
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar('request_timing', default=None)
+
+
+@dataclass
+class RequestTiming:
+    db_queries: int = 0
+    db_duration: float = 0.0
+    storage_calls: int = 0
+    storage_duration: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """Time each database query; see django.db.connection.execute_wrapper."""
+        start = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_duration += time.monotonic() - start
+
+    def server_timing(self, duration: float) -> str:
+        """Return the value of a Server-Timing header for this request, which took duration."""
+        return ', '.join(
+            [
+                f'db;dur={self.db_duration * 1000:.1f};desc="{self.db_queries} queries"',
+                f'storage;dur={self.storage_duration * 1000:.1f};'
+                f'desc="{self.storage_calls} calls"',
+                f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+                f'total;dur={duration * 1000:.1f}',
+            ]
+        )
+
+
+def activate(timing: RequestTiming) -> Token:
+    return _current.set(timing)
+
+
+def deactivate(token: Token) -> None:
+    _current.reset(token)
+
+
+def record_storage_call(duration: float) -> None:
+    timing = _current.get()
+    if timing is not None:
+        timing.storage_calls += 1
+        timing.storage_duration += duration
+
+
+def record_cache(hits: int = 0, misses: int = 0) -> None:
+    timing = _current.get()
+    if timing is not None:
+        timing.cache_hits += hits
+        timing.cache_misses += misses
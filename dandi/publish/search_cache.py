@@ -0,0 +1,68 @@
+"""
+Caching of search results.
+
+Search results only change when a Version is published, so every cache entry is keyed by a
+generation, which is bumped when a publish commits. The generation is kept in the database, so
+every process sees it, whether or not the cache is shared, and it's read by primary key. Entries
+of old generations are never read again, and simply expire.
+"""
+
+import hashlib
+from typing import Any, Callable, Dict
+
+from django.core.cache import cache
+from rest_framework.request import Request
+
+from dandi.publish import metrics, request_timing
+from dandi.publish.models import SearchGeneration
+
+HITS_KEY = 'search:hits'
+MISSES_KEY = 'search:misses'
+RESULT_TIMEOUT = 60 * 60
+
+
+def get_generation() -> int:
+    return SearchGeneration.get()
+
+
+def invalidate() -> None:
+    """Invalidate all cached search results."""
+    SearchGeneration.bump()
+
+
+def _normalize(key: str, value: str) -> str:
+    value = ' '.join(value.split())
+    # Full text search and suggestions are case insensitive
+    return value.lower() if key in ['search', 'q'] else value
+
+
+def get_or_compute(request: Request, compute: Callable[[], Any]) -> Any:
+    """Return the cached result of a search request, computing it upon a miss."""
+    params = sorted(
+        (key, _normalize(key, value)) for key, value in request.query_params.items() if value
+    )
+    # Absolute URLs for pagination are part of the result, so the host is part of the key
+    request_key = repr([request.build_absolute_uri(request.path), params])
+    key = f'search:{get_generation()}:{hashlib.sha256(request_key.encode()).hexdigest()}'
+
+    result = cache.get(key)
+    if result is None:
+        metrics.increment(MISSES_KEY)
+        request_timing.record_cache(misses=1)
+        result = compute()
+        cache.set(key, result, timeout=RESULT_TIMEOUT)
+    else:
+        metrics.increment(HITS_KEY)
+        request_timing.record_cache(hits=1)
+    return result
+
+
+def get_stats() -> Dict[str, Any]:
+    """Return the hit ratio of the cache, for the searches served by this process."""
+    hits = metrics.get_counter(HITS_KEY)
+    misses = metrics.get_counter(MISSES_KEY)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / (hits + misses) if hits + misses else None,
+    }
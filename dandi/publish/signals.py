@@ -0,0 +1,27 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from dandi.publish.models import ArchiveStats, Dandiset
+
+
+@receiver(post_save, sender=Dandiset)
+def dandiset_saved(sender, instance: Dandiset, created: bool, **kwargs):
+    if created:
+        ArchiveStats.increment(dandiset_count=1)
+
+
+@receiver(post_delete, sender=Dandiset)
+def dandiset_deleted(sender, instance: Dandiset, **kwargs):
+    ArchiveStats.increment(dandiset_count=-1)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance: User, created: bool, **kwargs):
+    if created:
+        ArchiveStats.increment(user_count=1)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance: User, **kwargs):
+    ArchiveStats.increment(user_count=-1)
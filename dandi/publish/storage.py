@@ -1,11 +1,26 @@
+import contextlib
+import functools
+import os
+import socket
+import time
+from typing import Iterator
 from urllib.parse import urlsplit, urlunsplit
 
+from botocore.config import Config
+import certifi
 from django.conf import settings
 from django.core.files.storage import Storage, get_storage_class
 from django.db import models
+import minio
 from minio_storage.policy import Policy
 from minio_storage.storage import MinioStorage, create_minio_client_from_settings
 from storages.backends.s3boto3 import S3Boto3Storage
+import urllib3
+
+from dandi.publish import metrics, request_timing
+
+# The operations of which the counts and latencies are recorded
+STORAGE_OPERATIONS = ['put', 'head', 'presign', 'delete', 'multipart_part']
 
 
 class CallableStorageFileField(models.FileField):
@@ -53,10 +68,29 @@ class DeconstructableMinioStorage(MinioStorage):
         # A minio.api.Minio instance cannot be serialized by Django. Since all constructor
         # arguments are serialized by the @deconstructible decorator, passing a Minio client as a
         # constructor argument causes makemigrations to fail.
-        kwargs['minio_client'] = create_minio_client_from_settings()
+        kwargs['minio_client'] = get_minio_client()
         super().__init__(*args, **kwargs)
 
 
+@functools.lru_cache(maxsize=None)
+def get_minio_client() -> minio.Minio:
+    """Return the Minio client shared by every storage of this process, and its pool."""
+    socket_options = urllib3.connection.HTTPConnection.default_socket_options
+    if settings.DANDI_STORAGE_TCP_KEEPALIVE:
+        socket_options = socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    # This is the same as the default pool of a Minio client, except for the size and keep-alive
+    http_client = urllib3.PoolManager(
+        timeout=urllib3.Timeout.DEFAULT_TIMEOUT,
+        maxsize=settings.DANDI_STORAGE_MAX_POOL_CONNECTIONS,
+        block=False,
+        socket_options=socket_options,
+        cert_reqs='CERT_REQUIRED',
+        ca_certs=os.environ.get('SSL_CERT_FILE') or certifi.where(),
+        retries=urllib3.Retry(total=5, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
+    )
+    return create_minio_client_from_settings(minio_kwargs={'http_client': http_client})
+
+
 class VerbatimNameStorageMixin:
     """A Storage mixin, storing files without transforming their original filename."""
 
@@ -75,14 +109,87 @@ class VerbatimNameStorageMixin:
         return filename
 
 
-class VerbatimNameS3Storage(VerbatimNameStorageMixin, S3Boto3Storage):
-    pass
+def _observe(operation: str, duration: float, error: bool = False) -> None:
+    metrics.observe(f'storage:{operation}', duration, error=error)
+    request_timing.record_storage_call(duration)
+
+
+@contextlib.contextmanager
+def _timed(operation: str) -> Iterator[None]:
+    start = time.monotonic()
+    try:
+        yield
+    except Exception:
+        _observe(operation, time.monotonic() - start, error=True)
+        raise
+    _observe(operation, time.monotonic() - start)
+
+
+class InstrumentedStorageMixin:
+    """A Storage mixin, recording the count and latency of requests to the object store."""
+
+    def _save(self, name, content):
+        with _timed('put'):
+            return super()._save(name, content)
+
+    def exists(self, name):
+        with _timed('head'):
+            return super().exists(name)
+
+    def size(self, name):
+        with _timed('head'):
+            return super().size(name)
+
+    def url(self, *args, **kwargs):
+        with _timed('presign'):
+            return super().url(*args, **kwargs)
 
+    def delete(self, name):
+        with _timed('delete'):
+            return super().delete(name)
 
-class VerbatimNameMinioStorage(VerbatimNameStorageMixin, DeconstructableMinioStorage):
+
+def _before_upload_part(context, **kwargs):
+    context['dandi_start'] = time.monotonic()
+
+
+def _after_upload_part(context, http_response=None, exception=None, **kwargs):
+    if 'dandi_start' in context:
+        error = exception is not None or http_response.status_code >= 400
+        _observe('multipart_part', time.monotonic() - context.pop('dandi_start'), error=error)
+
+
+class VerbatimNameS3Storage(InstrumentedStorageMixin, VerbatimNameStorageMixin, S3Boto3Storage):
+    @property
+    def connection(self):
+        created = getattr(self._connections, 'connection', None) is None
+        connection = super().connection
+        if created:
+            # Large files are uploaded in parts by boto3 itself, so their requests are only
+            # observable as events of the client
+            events = connection.meta.client.meta.events
+            events.register('before-call.s3.UploadPart', _before_upload_part)
+            events.register('after-call.s3.UploadPart', _after_upload_part)
+            events.register('after-call-error.s3.UploadPart', _after_upload_part)
+        return connection
+
+
+class VerbatimNameMinioStorage(
+    InstrumentedStorageMixin, VerbatimNameStorageMixin, DeconstructableMinioStorage
+):
     pass
 
 
+def get_s3_storage(bucket_name: str) -> Storage:
+    """Return the Storage instance of a bucket, which is shared by this whole process."""
+    return _get_s3_storage(bucket_name)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_s3_storage(bucket_name: str) -> Storage:
+    return create_s3_storage(bucket_name)
+
+
 def create_s3_storage(bucket_name: str) -> Storage:
     """
     Return a new Storage instance, compatible with the default Storage class.
@@ -96,6 +203,12 @@ def create_s3_storage(bucket_name: str) -> Storage:
 
     if issubclass(default_storage_class, S3Boto3Storage):
         storage = VerbatimNameS3Storage(bucket_name=bucket_name)
+        storage.config = storage.config.merge(
+            Config(
+                max_pool_connections=settings.DANDI_STORAGE_MAX_POOL_CONNECTIONS,
+                tcp_keepalive=settings.DANDI_STORAGE_TCP_KEEPALIVE,
+            )
+        )
     elif issubclass(default_storage_class, MinioStorage):
         base_url = None
         if getattr(settings, 'MINIO_STORAGE_MEDIA_URL', None):
@@ -1,26 +1,194 @@
+from collections import Counter
+import datetime
+from typing import Dict, List
+
 from celery import shared_task
 from celery.utils.log import get_task_logger
 from django.contrib.auth.models import User
-from django.db.transaction import atomic
+from django.core.exceptions import ValidationError
+from django.db import transaction
 
+from dandi.publish import search_cache
 from dandi.publish.girder import GirderClient
-from dandi.publish.models import Asset, Dandiset, Version
+from dandi.publish.models import (
+    ArchiveStats,
+    Asset,
+    Dandiset,
+    DandisetStorage,
+    DraftSyncSchedule,
+    DraftVersion,
+    PendingDraftSync,
+    StatsSnapshot,
+    Version,
+    VersionFacet,
+)
 
 logger = get_task_logger(__name__)
 
+# Changes to drafts in Girder usually come in bursts, which are synced together after this delay
+DRAFT_SYNC_DEBOUNCE = 10
+DRAFT_SYNC_SCHEDULE_TIMEOUT = datetime.timedelta(seconds=DRAFT_SYNC_DEBOUNCE * 6)
+
+# The time limits of tasks, in seconds. Upon the soft limit, a task is interrupted by an exception,
+# so it may roll back and clean up, before it is killed by the hard limit.
+PUBLISH_SOFT_TIME_LIMIT = 60 * 60 * 12
+SYNC_SOFT_TIME_LIMIT = 60 * 15
+MAINTENANCE_SOFT_TIME_LIMIT = 60 * 30
+TIME_LIMIT_GRACE = 60 * 5
+# Syncs triggered by users are more urgent than the daily reconciliation
+SYNC_PRIORITY = 6
+RECONCILE_PRIORITY = 2
+
+
+# A publish is only acknowledged once it's done, so it's redelivered if its worker is lost; this is
+# safe as it's rolled back
+@shared_task(
+    acks_late=True,
+    soft_time_limit=PUBLISH_SOFT_TIME_LIMIT,
+    time_limit=PUBLISH_SOFT_TIME_LIMIT + TIME_LIMIT_GRACE,
+)
+def publish_version(dandiset_id: int, user_id, publish_task_id: str) -> None:
+    dandiset = Dandiset.objects.select_related('draft_version').get(pk=dandiset_id)
+    user = User.objects.get(id=user_id)
+    draft_version = dandiset.draft_version
+    # The draft was locked in django by the publish action, for this task, with a lease covering
+    # its wait in the queue. Before any work, the lock is renewed for a running publish. If the
+    # lock was since lost, e.g. it expired and the user published again, or it was released while
+    # this task was redelivered after its worker was lost, then this publish must not proceed.
+    if not draft_version.renew_lock(user, DraftVersion.PUBLISH_LOCK_LEASE, publish_task_id):
+        logger.warning(
+            f'Dandiset {dandiset.identifier} is no longer locked for publish {publish_task_id}'
+        )
+        return
 
-@shared_task
-@atomic
-def publish_version(dandiset_id: int, user_id) -> None:
-    dandiset = Dandiset.objects.get(pk=dandiset_id)
     try:
-        with GirderClient(authenticate=True) as client:
-            with client.dandiset_lock(dandiset.identifier):
-                version = Version.from_girder(dandiset, client)
+        # The lock must be kept alive, or it may be reclaimed by others
+        with draft_version.hold_lock(
+            user, DraftVersion.PUBLISH_LOCK_LEASE, publish_task_id
+        ) as lock_lost:
+            with transaction.atomic():
+                with GirderClient(authenticate=True) as client:
+                    with client.dandiset_lock(dandiset.identifier):
+                        version = Version.from_girder(dandiset, client)
+
+                        for girder_file in client.files_in_folder(dandiset.draft_folder_id):
+                            Asset.from_girder(version, girder_file, client)
+
+                        VersionFacet.populate(version)
+                        # The archive statistics are shared by all writers, so they are only
+                        # updated last, to hold their lock shortly before this commits
+                        version.update_asset_stats()
+                        DandisetStorage.add_version(version)
 
-                for girder_file in client.files_in_folder(dandiset.draft_folder_id):
-                    Asset.from_girder(version, girder_file, client)
+                        if lock_lost.is_set():
+                            # Roll back, as the draft may have been changed concurrently
+                            raise ValidationError('The draft lock was lost while publishing')
+                        transaction.on_commit(search_cache.invalidate)
     finally:
-        # The draft was locked in django by the publish action
-        # We need to unlock it now
-        dandiset.draft_version.unlock(User.objects.get(id=user_id))
+        # Unlock only once the publish is committed or rolled back
+        try:
+            draft_version.unlock(user, publish_task_id)
+        except ValidationError:
+            logger.warning(f'Dandiset {dandiset.identifier} was no longer locked by the publish')
+
+
+@shared_task(
+    soft_time_limit=MAINTENANCE_SOFT_TIME_LIMIT,
+    time_limit=MAINTENANCE_SOFT_TIME_LIMIT + TIME_LIMIT_GRACE,
+)
+def reconcile_archive_stats() -> None:
+    """Correct any drift of the incrementally maintained archive statistics."""
+    ArchiveStats.reconcile()
+
+
+@shared_task(
+    soft_time_limit=MAINTENANCE_SOFT_TIME_LIMIT,
+    time_limit=MAINTENANCE_SOFT_TIME_LIMIT + TIME_LIMIT_GRACE,
+)
+def record_stats_snapshot() -> None:
+    StatsSnapshot.record()
+
+
+def _log_sync_outcomes(outcomes: Dict[str, str]) -> None:
+    summary = ', '.join(
+        f'{count} {outcome}' for outcome, count in Counter(outcomes.values()).items()
+    )
+    logger.info(f'Synced {len(outcomes)} dandisets from Girder: {summary or "none"}')
+
+
+@shared_task(
+    soft_time_limit=SYNC_SOFT_TIME_LIMIT,
+    time_limit=SYNC_SOFT_TIME_LIMIT + TIME_LIMIT_GRACE,
+    priority=SYNC_PRIORITY,
+)
+def sync_dandisets(draft_folder_ids: List[str]) -> Dict[str, str]:
+    with GirderClient() as client:
+        outcomes = Dandiset.sync_from_girder(draft_folder_ids, client)
+    _log_sync_outcomes(outcomes)
+    return outcomes
+
+
+# This syncs every Dandiset, so it may take as long as other maintenance
+@shared_task(
+    soft_time_limit=MAINTENANCE_SOFT_TIME_LIMIT,
+    time_limit=MAINTENANCE_SOFT_TIME_LIMIT + TIME_LIMIT_GRACE,
+    priority=RECONCILE_PRIORITY,
+)
+def reconcile_dandisets() -> Dict[str, str]:
+    """Sync every Dandiset draft in Girder."""
+    with GirderClient() as client:
+        outcomes = Dandiset.reconcile_girder(client)
+    _log_sync_outcomes(outcomes)
+    return outcomes
+
+
+def schedule_draft_sync(draft_folder_ids: List[str]) -> None:
+    """Sync some drafts soon, along with any others which change in the meantime."""
+    PendingDraftSync.add(draft_folder_ids)
+    # Only the first change of a burst schedules a sync. The schedule is cleared when the sync
+    # starts, but it also expires, in case the sync is lost.
+    if DraftSyncSchedule.schedule(DRAFT_SYNC_SCHEDULE_TIMEOUT):
+        try:
+            sync_pending_drafts.apply_async(countdown=DRAFT_SYNC_DEBOUNCE)
+        except Exception:
+            DraftSyncSchedule.clear()
+            raise
+
+
+@shared_task(
+    soft_time_limit=SYNC_SOFT_TIME_LIMIT,
+    time_limit=SYNC_SOFT_TIME_LIMIT + TIME_LIMIT_GRACE,
+    priority=SYNC_PRIORITY,
+)
+def sync_pending_drafts() -> Dict[str, str]:
+    # Allow changes made from now on to schedule another sync, so none can be missed
+    DraftSyncSchedule.clear()
+    # The folders of a sync which was killed are synced again by a later one
+    with PendingDraftSync.claim(
+        stale_after=datetime.timedelta(seconds=SYNC_SOFT_TIME_LIMIT + TIME_LIMIT_GRACE)
+    ) as draft_folder_ids:
+        if not draft_folder_ids:
+            return {}
+
+        with GirderClient() as client:
+            outcomes = Dandiset.sync_from_girder(draft_folder_ids, client)
+        # Failed folders are retried with the next sync
+        PendingDraftSync.release(
+            [
+                draft_folder_id
+                for draft_folder_id, outcome in outcomes.items()
+                if outcome == Dandiset.SYNC_FAILED
+            ]
+        )
+    _log_sync_outcomes(outcomes)
+    return outcomes
+
+
+@shared_task(
+    soft_time_limit=MAINTENANCE_SOFT_TIME_LIMIT,
+    time_limit=MAINTENANCE_SOFT_TIME_LIMIT + TIME_LIMIT_GRACE,
+)
+def release_expired_locks() -> None:
+    released = DraftVersion.release_expired_locks()
+    if released:
+        logger.info(f'Released {released} expired draft locks')
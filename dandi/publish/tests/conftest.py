@@ -1,7 +1,10 @@
+from django.core.cache import cache
 import pytest
 from pytest_factoryboy import register
 from rest_framework.test import APIClient
 
+from dandi.publish import metrics
+
 from .factories import (
     AssetFactory,
     DandisetFactory,
@@ -19,6 +22,13 @@ register(UserFactory)
 register(VersionFactory)
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # The cache and the metrics are not reset between tests, unlike the database
+    cache.clear()
+    metrics.reset()
+
+
 @pytest.fixture
 def girder_file(girder_file_factory):
     # TODO: Due to https://github.com/pytest-dev/pytest-factoryboy/issues/67 , this fixture is
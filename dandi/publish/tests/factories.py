@@ -65,3 +65,9 @@ class AssetFactory(factory.django.DjangoModelFactory):
     sha256 = factory.Faker('hexify', text='^' * 64)
     metadata = factory.Faker('pydict', value_types=['str', 'float', 'int'])
     blob = factory.django.FileField(data=b'somefilebytes')
+
+    @factory.post_generation
+    def version_asset_stats(self, create, extracted, **kwargs):
+        # Publishing updates the denormalized statistics once all assets are added
+        if create:
+            self.version.update_asset_stats()
@@ -1,7 +1,9 @@
 import contextlib
-from typing import Any, Dict, Iterator, List
+from typing import Any, Dict, Iterator, List, Optional
 
 import factory
+from rest_framework.response import Response
+from rest_framework.test import APIClient
 
 from dandi.publish.girder import GirderClient, GirderFile
 
@@ -36,17 +38,26 @@ class _GirderClientFileFactory(factory.DictFactory):
 
 
 class MockGirderClient(GirderClient):
-    def __init__(self, authenticate: bool = False, **kwargs) -> None:
+    def __init__(
+        self, authenticate: bool = False, folders: Optional[Dict[str, Dict]] = None, **kwargs
+    ) -> None:
         super().__init__(authenticate=False, **kwargs)
+        # Folders to return by id, instead of generated ones
+        self.folders = folders or {}
 
     def get_json(self, *args, **kwargs) -> Any:
         raise NotImplementedError
 
     def get_folder(self, folder_id: str) -> Dict:
-        if folder_id == 'magic_draft_folder_id':
-            return _GirderClientDraftFolderFactory()
+        if folder_id in self.folders:
+            return self.folders[folder_id]
+        elif folder_id == 'magic_draft_folder_id':
+            return _GirderClientDraftFolderFactory(_id=folder_id)
         else:
-            return _GirderClientFolderFactory()
+            return _GirderClientFolderFactory(_id=folder_id)
+
+    def get_draft_folders(self) -> List[Dict]:
+        return [self.get_folder('magic_draft_folder_id'), self.get_folder('not_a_draft_folder_id')]
 
     def get_subfolders(self, folder_id: str) -> List[Dict]:
         return _GirderClientFolderFactory.build_batch(1)
@@ -67,6 +78,25 @@ class MockGirderClient(GirderClient):
         yield
 
 
+class MockGirderEventEmitter:
+    """A stand-in for the Girder plugin which notifies of changes."""
+
+    def __init__(self, api_client: APIClient) -> None:
+        self.api_client = api_client
+        self.events: List[Dict] = []
+
+    def folder_changed(self, folder_id: str) -> None:
+        self.events.append({'model': 'folder', 'id': folder_id})
+
+    def item_changed(self, item_id: str) -> None:
+        self.events.append({'model': 'item', 'id': item_id})
+
+    def flush(self) -> Response:
+        resp = self.api_client.post('/api/girder/events/', {'events': self.events}, format='json')
+        self.events = []
+        return resp
+
+
 class GirderFileFactory(factory.Factory):
     class Meta:
         model = GirderFile
@@ -1,5 +1,6 @@
 import pytest
 
+from dandi.publish import metrics
 from dandi.publish.models import Asset
 
 from .fuzzy import TIMESTAMP_RE
@@ -13,6 +14,33 @@ def test_asset_from_girder(version, girder_file, mock_girder_client):
     assert asset
 
 
+@pytest.mark.django_db
+def test_asset_storage_metrics(version, girder_file, mock_girder_client):
+    asset = Asset.from_girder(version, girder_file, mock_girder_client)
+    asset.blob.url
+
+    stats = metrics.get_stats(['storage:put', 'storage:presign'])
+
+    assert stats['storage:put']['count'] == 1
+    assert stats['storage:put']['errors'] == 0
+    assert sum(bucket['count'] for bucket in stats['storage:put']['histogram']) == 1
+    assert stats['storage:presign']['count'] == 1
+
+
+def test_metrics_histogram():
+    metrics.observe('test', 0.001)
+    metrics.observe('test', 0.01)
+    metrics.observe('test', 60, error=True)
+
+    stats = metrics.get_stats(['test'])['test']
+
+    assert stats['count'] == 3
+    assert stats['errors'] == 1
+    assert stats['mean_duration'] == pytest.approx((0.001 + 0.01 + 60) / 3)
+    assert [bucket['count'] for bucket in stats['histogram']] == [1, 1] + [0] * 9 + [1]
+    assert stats['histogram'][-1]['le'] is None
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize(
     'path,qs,expected',
@@ -129,3 +157,53 @@ def test_asset_path_filter(api_client, asset, new_path, expected):
 
     matching_results = [res for res in partial_path_assets if res['uuid'] == str(asset.uuid)]
     assert bool(matching_results) is expected
+
+
+@pytest.mark.django_db
+def test_asset_rest_list_not_modified(api_client, asset):
+    url = (
+        f'/api/dandisets/{asset.version.dandiset.identifier}/'
+        f'versions/{asset.version.version}/assets/'
+    )
+    etag = api_client.get(url)['ETag']
+
+    resp = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert resp.status_code == 304
+    assert 'public' in resp['Cache-Control']
+    # Different pages have different representations
+    assert api_client.get(url, {'page_size': 10})['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_asset_rest_retrieve_not_modified(api_client, asset):
+    url = (
+        f'/api/dandisets/{asset.version.dandiset.identifier}/'
+        f'versions/{asset.version.version}/assets/{asset.uuid}/'
+    )
+    etag = api_client.get(url)['ETag']
+
+    resp = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert resp.status_code == 304
+
+
+@pytest.mark.django_db
+def test_storage_metrics_rest(api_client, user, asset):
+    asset.blob.url
+    user.is_staff = True
+    user.save()
+    api_client.force_authenticate(user=user)
+
+    resp = api_client.get('/api/metrics/storage/')
+
+    assert resp.status_code == 200
+    assert set(resp.data) == {'put', 'head', 'presign', 'delete', 'multipart_part'}
+    assert resp.data['presign']['count'] == 1
+
+
+@pytest.mark.django_db
+def test_storage_metrics_rest_not_admin(api_client, user):
+    api_client.force_authenticate(user=user)
+
+    assert api_client.get('/api/metrics/storage/').status_code == 403
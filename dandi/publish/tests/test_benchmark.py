@@ -0,0 +1,50 @@
+import datetime
+import time
+
+from django.core.management import call_command
+import pytest
+
+from dandi.publish.models import Asset, Version
+
+# These tests build large fixtures, so they only run when selected with "-m benchmark"
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+@pytest.fixture
+def large_dandiset(dandiset):
+    """Return a Dandiset with 1,000 published Versions of 1,000 Assets each."""
+    version_count = 1000
+    assets_per_version = 1000
+
+    start = datetime.datetime(2020, 1, 1)
+    versions = Version.objects.bulk_create(
+        Version(
+            dandiset=dandiset,
+            name=f'Version {i}',
+            version=Version.datetime_to_version(start + datetime.timedelta(minutes=i)),
+        )
+        for i in range(version_count)
+    )
+    for version in versions:
+        # Assets are inserted directly, without any blobs to upload
+        Asset.objects.bulk_create(
+            Asset(version=version, path=f'/sub-{i:04}/file.nwb', size=i, sha256=f'{i:064x}')
+            for i in range(assets_per_version)
+        )
+    call_command('backfill_version_stats')
+
+    return dandiset
+
+
+def test_benchmark_version_rest_list(
+    api_client, django_assert_num_queries, record_property, large_dandiset
+):
+    start = time.perf_counter()
+    with django_assert_num_queries(2):
+        resp = api_client.get(
+            f'/api/dandisets/{large_dandiset.identifier}/versions/', {'page_size': 100}
+        )
+    record_property('elapsed_ms', (time.perf_counter() - start) * 1000)
+
+    assert resp.data['count'] == 1000
+    assert all(result['assets_count'] == 1000 for result in resp.data['results'])
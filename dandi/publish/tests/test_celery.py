@@ -0,0 +1,78 @@
+from pathlib import Path
+import re
+
+from celery import Celery
+from django.conf import settings
+import pytest
+
+from dandi.publish import tasks
+
+PROCFILE = Path(__file__).parents[3] / 'Procfile'
+
+
+def procfile_worker_queues():
+    """Return the queues consumed by each worker process type of the Procfile."""
+    worker_queues = {}
+    for line in PROCFILE.read_text().splitlines():
+        process_type, _, command = line.partition(':')
+        match = re.search(r'celery worker .*--queues (\S+)', command)
+        if match:
+            worker_queues[process_type] = match.group(1).split(',')
+    return worker_queues
+
+
+@pytest.fixture
+def memory_app():
+    # The tasks are routed by the same configuration, but sent to an in-memory broker
+    app = Celery(set_as_current=False)
+    app.config_from_object('django.conf:settings', namespace='CELERY')
+    app.conf.update(broker_url='memory://', task_always_eager=False)
+    yield app
+    app.close()
+
+
+def receive(app: Celery, queue: str):
+    with app.connection_for_read() as connection:
+        with connection.SimpleQueue(app.amqp.queues[queue]) as simple_queue:
+            message = simple_queue.get(timeout=1)
+            message.ack()
+            return message
+
+
+@pytest.mark.parametrize(
+    'task,args,queue,priority',
+    [
+        (tasks.publish_version, [1, 1, 'task'], 'publish', 4),
+        (tasks.sync_dandisets, [['f' * 24]], 'sync', 6),
+        (tasks.sync_pending_drafts, [], 'sync', 6),
+        (tasks.reconcile_dandisets, [], 'sync', 2),
+        (tasks.reconcile_archive_stats, [], 'maintenance', 4),
+        (tasks.release_expired_locks, [], 'maintenance', 4),
+    ],
+)
+def test_task_routing(memory_app, task, args, queue, priority):
+    memory_app.tasks[task.name].apply_async(args)
+
+    message = receive(memory_app, queue)
+
+    assert message.headers['task'] == task.name
+    assert message.properties['priority'] == priority
+    assert memory_app.amqp.queues[queue].queue_arguments == {'x-max-priority': 9}
+
+
+def test_worker_profiles():
+    worker_queues = procfile_worker_queues()
+    routed_queues = {route['queue'] for route in settings.CELERY_TASK_ROUTES.values()} | {
+        settings.CELERY_TASK_DEFAULT_QUEUE
+    }
+
+    # Every queue is consumed by exactly one worker process type
+    assert sorted(queue for queues in worker_queues.values() for queue in queues) == sorted(
+        routed_queues
+    )
+    assert worker_queues['publishworker'] == ['publish']
+
+
+def test_publish_version_options():
+    assert tasks.publish_version.acks_late
+    assert tasks.publish_version.soft_time_limit < tasks.publish_version.time_limit
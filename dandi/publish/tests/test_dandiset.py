@@ -1,6 +1,12 @@
+import datetime
+
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+import httpx
 import pytest
 
-from dandi.publish.models import Dandiset
+from dandi.publish.girder import GirderError
+from dandi.publish.models import ArchiveStats, Dandiset, DandisetStorage
 
 from .fuzzy import TIMESTAMP_RE
 
@@ -32,6 +38,93 @@ def test_dandiset_from_girder(mock_girder_client):
     assert dandiset
 
 
+@pytest.mark.django_db
+def test_dandiset_sync_girder_folder(draft_version):
+    dandiset = draft_version.dandiset
+    draft_version.metadata = {'name': draft_version.name, 'description': 'A description'}
+    draft_version.save()
+    draft_folder = {
+        '_id': dandiset.draft_folder_id,
+        'name': dandiset.identifier,
+        'meta': {'dandiset': dict(draft_version.metadata)},
+    }
+
+    assert Dandiset.sync_girder_folder(draft_folder) == (dandiset, Dandiset.SYNC_UNCHANGED)
+
+    draft_folder['meta']['dandiset'] = {'name': 'New name'}
+    assert Dandiset.sync_girder_folder(draft_folder) == (dandiset, Dandiset.SYNC_UPDATED)
+    draft_version.refresh_from_db()
+    assert draft_version.name == 'New name'
+    assert draft_version.metadata == {'name': 'New name'}
+
+    draft_folder['name'] = f'{dandiset.id + 1:06}'
+    new_dandiset, outcome = Dandiset.sync_girder_folder(draft_folder)
+    assert outcome == Dandiset.SYNC_CREATED
+    assert new_dandiset.draft_version.name == 'New name'
+
+
+@pytest.mark.django_db
+def test_dandiset_sync_girder_folder_mismatch(dandiset):
+    draft_folder = {'_id': 'f' * 24, 'name': dandiset.identifier, 'meta': {'dandiset': {}}}
+
+    with pytest.raises(GirderError, match='does not'):
+        Dandiset.sync_girder_folder(draft_folder)
+
+
+@pytest.mark.django_db
+def test_dandiset_sync_from_girder(mock_girder_client):
+    outcomes = Dandiset.sync_from_girder(
+        ['magic_draft_folder_id', 'not_a_draft_folder_id'], mock_girder_client
+    )
+
+    assert outcomes == {
+        'magic_draft_folder_id': Dandiset.SYNC_CREATED,
+        'not_a_draft_folder_id': Dandiset.SYNC_FAILED,
+    }
+    assert Dandiset.objects.get().draft_folder_id == 'magic_draft_folder_id'
+
+
+@pytest.mark.django_db
+def test_dandiset_sync_from_girder_connection_error(mock_girder_client, mocker):
+    get_folder = mock_girder_client.get_folder
+
+    def get_folder_or_fail(folder_id):
+        if folder_id == 'unreachable_folder_id':
+            raise httpx.ConnectError('Connection refused')
+        return get_folder(folder_id)
+
+    mocker.patch.object(mock_girder_client, 'get_folder', side_effect=get_folder_or_fail)
+
+    outcomes = Dandiset.sync_from_girder(
+        ['unreachable_folder_id', 'magic_draft_folder_id'], mock_girder_client
+    )
+
+    # The other folders are synced anyway
+    assert outcomes == {
+        'unreachable_folder_id': Dandiset.SYNC_FAILED,
+        'magic_draft_folder_id': Dandiset.SYNC_CREATED,
+    }
+
+
+@pytest.mark.django_db
+def test_dandiset_sync_from_girder_integrity_error(mock_girder_client, mocker):
+    # e.g. another sync created the same Dandiset concurrently
+    mocker.patch.object(Dandiset, 'save', side_effect=IntegrityError('duplicate key value'))
+
+    outcomes = Dandiset.sync_from_girder(['magic_draft_folder_id'], mock_girder_client)
+
+    assert outcomes == {'magic_draft_folder_id': Dandiset.SYNC_FAILED}
+    assert not Dandiset.objects.exists()
+
+
+@pytest.mark.django_db
+def test_dandiset_reconcile_girder(mock_girder_client):
+    assert Dandiset.reconcile_girder(mock_girder_client) == {
+        'magic_draft_folder_id': Dandiset.SYNC_CREATED,
+        'not_a_draft_folder_id': Dandiset.SYNC_FAILED,
+    }
+
+
 @pytest.mark.django_db
 def test_dandiset_rest_list(api_client, dandiset):
     assert api_client.get('/api/dandisets/').data == {
@@ -39,15 +132,189 @@ def test_dandiset_rest_list(api_client, dandiset):
         'next': None,
         'previous': None,
         'results': [
-            {'identifier': dandiset.identifier, 'created': TIMESTAMP_RE, 'modified': TIMESTAMP_RE}
+            {
+                'identifier': dandiset.identifier,
+                'created': TIMESTAMP_RE,
+                'modified': TIMESTAMP_RE,
+                'draft_version': {
+                    'name': dandiset.draft_version.name,
+                    'modified': TIMESTAMP_RE,
+                    'locked': False,
+                    'locked_by': None,
+                },
+                'most_recent_version': None,
+            }
         ],
     }
 
 
 @pytest.mark.django_db
-def test_dandiset_rest_retrieve(api_client, dandiset):
+def test_dandiset_rest_list_num_queries(
+    api_client, django_assert_num_queries, dandiset_factory, version_factory, user
+):
+    for dandiset in dandiset_factory.create_batch(3):
+        version_factory.create_batch(2, dandiset=dandiset)
+        dandiset.draft_version.locked_by = user
+        dandiset.draft_version.save()
+    dandiset_factory()
+
+    # One query to count, one for the page with the drafts, and one for the most recent versions
+    with django_assert_num_queries(3):
+        resp = api_client.get('/api/dandisets/')
+
+    assert [result['draft_version']['locked_by'] for result in resp.data['results']] == [
+        {'username': user.username}
+    ] * 3 + [None]
+    for dandiset, result in zip(Dandiset.objects.all(), resp.data['results']):
+        most_recent_version = dandiset.versions.order_by('-version').first()
+        assert result['most_recent_version'] == (
+            {
+                'version': most_recent_version.version,
+                'name': most_recent_version.name,
+                'created': TIMESTAMP_RE,
+                'assets_count': 0,
+                'size': 0,
+            }
+            if most_recent_version
+            else None
+        )
+
+
+@pytest.mark.django_db
+def test_dandiset_rest_retrieve(api_client, version):
+    dandiset = version.dandiset
     assert api_client.get(f'/api/dandisets/{dandiset.identifier}/').data == {
         'identifier': dandiset.identifier,
         'created': TIMESTAMP_RE,
         'modified': TIMESTAMP_RE,
+        'draft_version': {
+            'name': dandiset.draft_version.name,
+            'modified': TIMESTAMP_RE,
+            'locked': False,
+            'locked_by': None,
+        },
+        'most_recent_version': {
+            'version': version.version,
+            'name': version.name,
+            'created': TIMESTAMP_RE,
+            'assets_count': 0,
+            'size': 0,
+        },
     }
+
+
+@pytest.mark.django_db
+def test_dandiset_rest_retrieve_lock_expired(api_client, dandiset, user):
+    dandiset.draft_version.lock(user, lease=datetime.timedelta(0))
+
+    draft_version = api_client.get(f'/api/dandisets/{dandiset.identifier}/').data['draft_version']
+
+    assert (draft_version['locked'], draft_version['locked_by']) == (False, None)
+
+
+@pytest.mark.django_db
+def test_dandiset_storage_add_version(dandiset, version_factory, asset_factory):
+    ArchiveStats.get()
+    first = version_factory(dandiset=dandiset)
+    asset_factory(version=first, sha256='a' * 64, size=100)
+    asset_factory(version=first, sha256='b' * 64, size=10)
+    DandisetStorage.add_version(first)
+    # An unchanged asset, a duplicate within the version, and a new asset
+    second = version_factory(dandiset=dandiset)
+    asset_factory(version=second, sha256='a' * 64, size=100)
+    asset_factory(version=second, sha256='c' * 64, size=1)
+    asset_factory(version=second, sha256='c' * 64, size=1)
+    DandisetStorage.add_version(second)
+    # Another dandiset shares a blob
+    other = version_factory()
+    asset_factory(version=other, sha256='b' * 64, size=10)
+    DandisetStorage.add_version(other)
+
+    dandiset.storage.refresh_from_db()
+    assert (dandiset.storage.logical_size, dandiset.storage.unique_size) == (212, 111)
+    assert (other.dandiset.storage.logical_size, other.dandiset.storage.unique_size) == (10, 10)
+    assert ArchiveStats.get().unique_size == 111
+
+    # Recomputing from scratch yields the same result
+    assert DandisetStorage.reconcile(dandiset).unique_size == 111
+    assert ArchiveStats.reconcile().unique_size == 111
+
+
+@pytest.mark.django_db
+def test_dandiset_storage_add_version_locks_stats(version, asset_factory):
+    ArchiveStats.get()
+    asset_factory(version=version, sha256='a' * 64, size=100)
+
+    with CaptureQueriesContext(connection) as queries:
+        DandisetStorage.add_version(version)
+
+    # The archive statistics are locked before any unique size is computed
+    locking = [
+        index
+        for index, query in enumerate(queries)
+        if 'publish_archivestats' in query['sql'] and 'FOR UPDATE' in query['sql']
+    ]
+    assert locking
+    assert locking[0] < min(
+        index for index, query in enumerate(queries) if 'sha256' in query['sql']
+    )
+
+
+@pytest.mark.django_db
+def test_dandiset_rest_storage(api_client, version, asset_factory):
+    asset_factory(version=version, sha256='a' * 64, size=100)
+    asset_factory(version=version, sha256='a' * 64, size=100)
+    DandisetStorage.add_version(version)
+
+    assert api_client.get(f'/api/dandisets/{version.dandiset.identifier}/storage/').data == {
+        'logical_size': 200,
+        'unique_size': 100,
+        'duplicate_size': 100,
+    }
+
+
+@pytest.mark.django_db
+def test_dandiset_rest_storage_unpublished(api_client, dandiset):
+    assert api_client.get(f'/api/dandisets/{dandiset.identifier}/storage/').data == {
+        'logical_size': 0,
+        'unique_size': 0,
+        'duplicate_size': 0,
+    }
+
+
+@pytest.mark.django_db
+def test_dandiset_rest_sync(api_client, user, mocker):
+    delay = mocker.patch('dandi.publish.views.dandiset.sync_dandisets.delay')
+    api_client.force_authenticate(user=user)
+
+    resp = api_client.post('/api/dandisets/sync/?folder-id=' + 'a' * 24)
+
+    assert resp.status_code == 202
+    delay.assert_called_once_with(['a' * 24])
+
+
+@pytest.mark.django_db
+def test_dandiset_rest_bulk_sync(api_client, user, mocker):
+    delay = mocker.patch('dandi.publish.views.dandiset.sync_dandisets.delay')
+    delay.return_value.id = 'task-id'
+    api_client.force_authenticate(user=user)
+
+    resp = api_client.post(
+        '/api/dandisets/sync/bulk/', {'folder_ids': ['a' * 24, 'b' * 24]}, format='json'
+    )
+
+    assert resp.status_code == 202
+    assert resp.data == {'task_id': 'task-id'}
+    delay.assert_called_once_with(['a' * 24, 'b' * 24])
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('folder_ids', [[], ['not a folder id']])
+def test_dandiset_rest_bulk_sync_invalid(api_client, user, mocker, folder_ids):
+    delay = mocker.patch('dandi.publish.views.dandiset.sync_dandisets.delay')
+    api_client.force_authenticate(user=user)
+
+    resp = api_client.post('/api/dandisets/sync/bulk/', {'folder_ids': folder_ids}, format='json')
+
+    assert resp.status_code == 400
+    delay.assert_not_called()
@@ -1,6 +1,14 @@
-from guardian.shortcuts import assign_perm
+import datetime
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from guardian.shortcuts import assign_perm, remove_perm
 import pytest
 
+from dandi.publish.models import DraftVersion
+
 from .fuzzy import TIMESTAMP_RE
 
 
@@ -131,3 +139,189 @@ def test_draft_rest_add_malformed(api_client, draft_version, user):
     )
     assert resp.status_code == 400
     assert resp.data == [{'username': ['This field is required.']}]
+
+
+@pytest.mark.django_db
+def test_draft_rest_last_modified(api_client, draft_version):
+    url = f'/api/dandisets/{draft_version.dandiset.identifier}/draft/'
+    resp = api_client.get(url)
+
+    assert resp.status_code == 200
+    assert resp['Last-Modified'] == http_date(draft_version.modified.timestamp())
+    assert 'no-cache' in resp['Cache-Control']
+
+    resp = api_client.get(url, HTTP_IF_MODIFIED_SINCE=resp['Last-Modified'])
+
+    assert resp.status_code == 304
+
+
+@pytest.mark.django_db
+def test_draft_rest_etag(api_client, draft_version, user, mocker):
+    url = f'/api/dandisets/{draft_version.dandiset.identifier}/draft/'
+    etag = api_client.get(url)['ETag']
+
+    resp = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert resp.status_code == 304
+    assert resp['ETag'] == etag
+
+    # e.g. synced from Girder
+    draft_version.dandiset.save()
+    resp = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200
+    etag = resp['ETag']
+
+    draft_version.lock(user)
+    resp = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200
+    etag = resp['ETag']
+
+    # A lock which expires changes the representation, without modifying the draft
+    mocker.patch(
+        'django.utils.timezone.now',
+        return_value=draft_version.locked_until + datetime.timedelta(seconds=1),
+    )
+    resp = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200
+    assert not resp.data['locked']
+
+
+@pytest.mark.django_db
+def test_draft_prefetch_owners(draft_version_factory, user_factory):
+    draft_versions = draft_version_factory.create_batch(3)
+    users = user_factory.create_batch(2)
+    for user in users:
+        assign_perm('owner', user, draft_versions[0])
+    assign_perm('owner', users[1], draft_versions[1])
+
+    with CaptureQueriesContext(connection) as queries:
+        DraftVersion.prefetch_owners(draft_versions)
+        owners = [draft_version.owners for draft_version in draft_versions]
+
+    assert owners == [users, [users[1]], []]
+    # Beyond the cached content type, a single query fetches the owners of every draft
+    assert len([query for query in queries if 'guardian_userobjectpermission' in query['sql']]) == 1
+
+
+@pytest.mark.django_db
+def test_draft_owners_changed(draft_version, user_factory):
+    user1 = user_factory()
+    user2 = user_factory()
+    assign_perm('owner', user1, draft_version)
+    assert draft_version.owners == [user1]
+
+    assign_perm('owner', user2, draft_version)
+    assert draft_version.owners == [user1, user2]
+
+    remove_perm('owner', user1, draft_version)
+    assert draft_version.owners == [user2]
+
+
+@pytest.mark.django_db
+def test_draft_set_owners(draft_version, user_factory):
+    user1, user2, user3 = user_factory.create_batch(3)
+    assign_perm('owner', user1, draft_version)
+    assign_perm('owner', user2, draft_version)
+    assert draft_version.owners == [user1, user2]
+
+    # Duplicates are ignored
+    draft_version.set_owners([user3, user2, user3])
+
+    assert draft_version.owners == [user2, user3]
+    assert DraftVersion.objects.get(pk=draft_version.pk).owners == [user2, user3]
+
+
+@pytest.mark.django_db
+def test_drafts_rest_list(api_client, draft_version_factory, user):
+    draft_versions = sorted(draft_version_factory.create_batch(3), key=lambda draft: draft.pk)
+    assign_perm('owner', user, draft_versions[1])
+
+    resp = api_client.get('/api/drafts/', {'page_size': 2})
+
+    assert resp.status_code == 200
+    assert [draft['dandiset']['identifier'] for draft in resp.data['results']] == [
+        draft_version.dandiset.identifier for draft_version in draft_versions[:2]
+    ]
+    assert resp.data['results'][1]['owners'] == [{'username': user.username}]
+    assert resp.data['previous'] is None
+
+    resp = api_client.get(resp.data['next'])
+
+    assert [draft['dandiset']['identifier'] for draft in resp.data['results']] == [
+        draft_versions[2].dandiset.identifier
+    ]
+    assert resp.data['next'] is None
+
+
+@pytest.mark.django_db
+def test_drafts_rest_list_queries(
+    api_client, draft_version_factory, user, django_assert_num_queries
+):
+    for draft_version in draft_version_factory.create_batch(3):
+        assign_perm('owner', user, draft_version)
+
+    # Drafts with their dandisets and lock holders, and the owners of every draft on the page
+    with django_assert_num_queries(2):
+        resp = api_client.get('/api/drafts/')
+    assert resp.status_code == 200
+    assert len(resp.data['results']) == 3
+
+
+@pytest.mark.django_db
+def test_drafts_rest_filter_owner(api_client, draft_version_factory, user_factory):
+    user1, user2 = user_factory.create_batch(2)
+    draft_version1, draft_version2, _ = draft_version_factory.create_batch(3)
+    assign_perm('owner', user1, draft_version1)
+    assign_perm('owner', user2, draft_version2)
+
+    resp = api_client.get('/api/drafts/', {'owner': user1.username})
+
+    assert [draft['dandiset']['identifier'] for draft in resp.data['results']] == [
+        draft_version1.dandiset.identifier
+    ]
+
+    resp = api_client.get('/api/drafts/', {'owner': 'nobody'})
+
+    assert resp.data['results'] == []
+
+
+@pytest.mark.django_db
+def test_drafts_rest_filter_locked(api_client, draft_version_factory, user_factory):
+    user1, user2 = user_factory.create_batch(2)
+    draft_version1, draft_version2, draft_version3, draft_version4 = sorted(
+        draft_version_factory.create_batch(4), key=lambda draft: draft.pk
+    )
+    draft_version1.lock(user1)
+    draft_version2.lock(user2)
+    draft_version3.lock(user1)
+    # An expired lock is not held anymore
+    DraftVersion.objects.filter(pk=draft_version3.pk).update(
+        locked_until=timezone.now() - datetime.timedelta(minutes=1)
+    )
+
+    def identifiers(params):
+        resp = api_client.get('/api/drafts/', params)
+        assert resp.status_code == 200
+        return [draft['dandiset']['identifier'] for draft in resp.data['results']]
+
+    assert identifiers({'locked': 'true'}) == [
+        draft_version1.dandiset.identifier,
+        draft_version2.dandiset.identifier,
+    ]
+    assert identifiers({'locked': 'false'}) == [
+        draft_version3.dandiset.identifier,
+        draft_version4.dandiset.identifier,
+    ]
+    assert identifiers({'locked_by': user1.username, 'locked': 'true'}) == [
+        draft_version1.dandiset.identifier
+    ]
+    # The holder of an expired lock is not a lock holder either
+    assert identifiers({'locked_by': user1.username}) == [draft_version1.dandiset.identifier]
+
+    resp = api_client.get('/api/drafts/')
+    assert [(draft['locked'], draft['locked_by']) for draft in resp.data['results']] == [
+        (True, {'username': user1.username}),
+        (True, {'username': user2.username}),
+        (False, None),
+        (False, None),
+    ]
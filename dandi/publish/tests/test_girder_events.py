@@ -0,0 +1,163 @@
+import datetime
+
+from django.utils import timezone
+import pytest
+
+from dandi.publish.models import PendingDraftSync
+from dandi.publish.tasks import sync_pending_drafts
+
+from .girder import MockGirderClient, MockGirderEventEmitter
+
+
+@pytest.fixture
+def girder_event_emitter(api_client, user):
+    user.is_staff = True
+    user.save()
+    api_client.force_authenticate(user=user)
+    return MockGirderEventEmitter(api_client)
+
+
+@pytest.mark.django_db
+def test_girder_events_debounce(girder_event_emitter, dandiset_factory, mocker):
+    apply_async = mocker.patch('dandi.publish.tasks.sync_pending_drafts.apply_async')
+    dandisets = dandiset_factory.create_batch(2)
+
+    girder_event_emitter.folder_changed(dandisets[0].draft_folder_id)
+    girder_event_emitter.folder_changed(dandisets[0].draft_folder_id)
+    # Only draft folders are relevant
+    girder_event_emitter.folder_changed('f' * 24)
+    girder_event_emitter.item_changed('e' * 24)
+    resp = girder_event_emitter.flush()
+    assert resp.status_code == 202
+    assert resp.data == {'scheduled': 1}
+
+    # A change in the same burst is synced by the same task
+    girder_event_emitter.folder_changed(dandisets[1].draft_folder_id)
+    assert girder_event_emitter.flush().status_code == 202
+
+    apply_async.assert_called_once()
+    assert set(PendingDraftSync.objects.values_list('draft_folder_id', flat=True)) == {
+        dandiset.draft_folder_id for dandiset in dandisets
+    }
+
+
+@pytest.mark.django_db
+def test_girder_events_after_sync_start(girder_event_emitter, dandiset_factory, mocker):
+    apply_async = mocker.patch('dandi.publish.tasks.sync_pending_drafts.apply_async')
+    mocker.patch('dandi.publish.tasks.GirderClient', MockGirderClient)
+    dandisets = dandiset_factory.create_batch(2)
+
+    girder_event_emitter.folder_changed(dandisets[0].draft_folder_id)
+    girder_event_emitter.flush()
+    # The schedule is shared through the database, so a sync in a worker clears it for all
+    sync_pending_drafts()
+    girder_event_emitter.folder_changed(dandisets[1].draft_folder_id)
+    girder_event_emitter.flush()
+
+    assert apply_async.call_count == 2
+
+
+@pytest.mark.django_db
+def test_girder_events_not_admin(api_client, user):
+    api_client.force_authenticate(user=user)
+
+    resp = api_client.post(
+        '/api/girder/events/', {'events': [{'model': 'folder', 'id': 'f' * 24}]}, format='json'
+    )
+
+    assert resp.status_code == 403
+
+
+@pytest.mark.django_db
+def test_girder_events_invalid(girder_event_emitter):
+    girder_event_emitter.events = [{'model': 'collection', 'id': 'f' * 24}]
+
+    assert girder_event_emitter.flush().status_code == 400
+
+
+@pytest.mark.django_db
+def test_sync_pending_drafts(girder_event_emitter, dandiset_factory, mocker):
+    mocker.patch('dandi.publish.tasks.sync_pending_drafts.apply_async')
+    changed, unchanged = dandiset_factory.create_batch(2)
+    folders = {
+        dandiset.draft_folder_id: {
+            '_id': dandiset.draft_folder_id,
+            'name': dandiset.identifier,
+            'meta': {'dandiset': {'name': f'New name {dandiset.identifier}'}},
+        }
+        for dandiset in [changed, unchanged]
+    }
+    mocker.patch(
+        'dandi.publish.tasks.GirderClient', lambda **kwargs: MockGirderClient(folders=folders)
+    )
+    girder_event_emitter.folder_changed(changed.draft_folder_id)
+    girder_event_emitter.flush()
+
+    assert sync_pending_drafts() == {changed.draft_folder_id: 'updated'}
+
+    changed.draft_version.refresh_from_db()
+    unchanged.draft_version.refresh_from_db()
+    assert changed.draft_version.name == f'New name {changed.identifier}'
+    assert unchanged.draft_version.name != f'New name {unchanged.identifier}'
+    assert not PendingDraftSync.objects.exists()
+    # Nothing is left to sync
+    assert sync_pending_drafts() == {}
+
+
+@pytest.mark.django_db
+def test_sync_pending_drafts_error(dandiset, mocker):
+    mocker.patch('dandi.publish.tasks.GirderClient', side_effect=ConnectionError)
+    PendingDraftSync.add([dandiset.draft_folder_id])
+
+    with pytest.raises(ConnectionError):
+        sync_pending_drafts()
+
+    # The folder is synced by a later sync instead
+    pending = PendingDraftSync.objects.get()
+    assert pending.draft_folder_id == dandiset.draft_folder_id
+    assert pending.claimed is None
+
+
+@pytest.mark.django_db
+def test_sync_pending_drafts_failed(dandiset, mocker):
+    mocker.patch('dandi.publish.tasks.GirderClient', MockGirderClient)
+    # The folder is not a draft folder of this Dandiset, so it fails to sync
+    PendingDraftSync.add([dandiset.draft_folder_id])
+
+    assert sync_pending_drafts() == {dandiset.draft_folder_id: 'failed'}
+
+    assert PendingDraftSync.objects.get().claimed is None
+
+
+@pytest.mark.django_db
+def test_pending_draft_sync_changed_while_claimed(dandiset_factory):
+    dandisets = dandiset_factory.create_batch(2)
+    PendingDraftSync.add([dandiset.draft_folder_id for dandiset in dandisets])
+
+    with PendingDraftSync.claim(stale_after=datetime.timedelta(minutes=20)) as draft_folder_ids:
+        assert len(draft_folder_ids) == 2
+        # Claimed folders are not claimed by a concurrent sync
+        with PendingDraftSync.claim(stale_after=datetime.timedelta(minutes=20)) as concurrent:
+            assert concurrent == []
+        PendingDraftSync.add([dandisets[0].draft_folder_id])
+
+    assert list(PendingDraftSync.objects.values_list('draft_folder_id', flat=True)) == [
+        dandisets[0].draft_folder_id
+    ]
+
+
+@pytest.mark.django_db
+def test_pending_draft_sync_stale_claim(dandiset_factory):
+    stale, recent = dandiset_factory.create_batch(2)
+    PendingDraftSync.add([stale.draft_folder_id, recent.draft_folder_id])
+    # Claims which a killed sync never released
+    now = timezone.now()
+    PendingDraftSync.objects.filter(draft_folder_id=stale.draft_folder_id).update(
+        claimed=now - datetime.timedelta(minutes=30)
+    )
+    PendingDraftSync.objects.filter(draft_folder_id=recent.draft_folder_id).update(
+        claimed=now - datetime.timedelta(minutes=5)
+    )
+
+    with PendingDraftSync.claim(stale_after=datetime.timedelta(minutes=20)) as draft_folder_ids:
+        assert draft_folder_ids == [stale.draft_folder_id]
@@ -1,6 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+import datetime
+import threading
+import time
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.utils import timezone
 from guardian.shortcuts import assign_perm
 import pytest
 
+from dandi.publish import tasks
+from dandi.publish.models import Asset, DandisetStorage, DraftVersion, VersionFacet
+
 
 @pytest.mark.django_db
 def test_lock(draft_version, user):
@@ -64,6 +76,142 @@ def test_unlock_other_user(draft_version, user_factory):
         draft_version.unlock(user2)
 
 
+@pytest.mark.django_db
+def test_lock_persisted(draft_version, user):
+    draft_version.lock(user)
+
+    draft_version.refresh_from_db()
+    assert draft_version.locked_by == user
+    assert draft_version.locked_until > draft_version.modified
+
+
+@pytest.mark.django_db
+def test_lock_stale_draft(draft_version, user_factory):
+    user1 = user_factory()
+    user2 = user_factory()
+    stale_draft_version = DraftVersion.objects.get(pk=draft_version.pk)
+    draft_version.lock(user1)
+
+    # The lock is checked in the database, not on the in-memory instance
+    with pytest.raises(ValidationError, match='Draft is locked'):
+        stale_draft_version.lock(user2)
+
+
+@pytest.mark.django_db
+def test_lock_expired(draft_version, user_factory):
+    user1 = user_factory()
+    user2 = user_factory()
+    draft_version.lock(user1, lease=datetime.timedelta(0))
+    assert not draft_version.locked
+
+    draft_version.lock(user2)
+
+    assert draft_version.locked_by == user2
+    with pytest.raises(ValidationError, match='Cannot unlock a draft locked by another user'):
+        draft_version.unlock(user1)
+
+
+@pytest.mark.django_db
+def test_renew_lock(draft_version, user_factory):
+    user1 = user_factory()
+    user2 = user_factory()
+    draft_version.lock(user1, lease=datetime.timedelta(0))
+
+    assert draft_version.renew_lock(user1)
+    assert draft_version.locked
+    assert not draft_version.renew_lock(user2)
+
+
+@pytest.mark.django_db
+def test_renew_lock_publish_task(draft_version, user):
+    draft_version.lock(user, publish_task_id='a')
+
+    assert not draft_version.renew_lock(user, publish_task_id='b')
+    assert draft_version.renew_lock(user, publish_task_id='a')
+    with pytest.raises(ValidationError, match='Cannot unlock a draft locked by another publish'):
+        draft_version.unlock(user, publish_task_id='b')
+    draft_version.unlock(user, publish_task_id='a')
+    assert not draft_version.locked
+
+
+@pytest.mark.django_db
+def test_release_expired_locks(draft_version_factory, user):
+    expired = draft_version_factory()
+    expired.lock(user, lease=datetime.timedelta(0))
+    held = draft_version_factory()
+    held.lock(user)
+
+    assert DraftVersion.release_expired_locks() == 1
+
+    expired.refresh_from_db()
+    held.refresh_from_db()
+    assert expired.locked_by is None
+    assert held.locked_by == user
+
+
+@pytest.mark.django_db(transaction=True)
+def test_hold_lock(draft_version, user, mocker):
+    draft_version.lock(user, lease=datetime.timedelta(0))
+    renewed = threading.Event()
+    renew_lock = draft_version.renew_lock
+
+    def renew(*args, **kwargs):
+        held = renew_lock(*args, **kwargs)
+        renewed.set()
+        return held
+
+    mocker.patch.object(draft_version, 'renew_lock', side_effect=renew)
+
+    with draft_version.hold_lock(user, DraftVersion.PUBLISH_LOCK_LEASE, interval=0.01) as lost:
+        # Without renewal, the lease would have expired
+        assert renewed.wait(timeout=10)
+        assert DraftVersion.objects.get(pk=draft_version.pk).locked
+        assert not lost.is_set()
+
+        draft_version.unlock(user)
+        assert lost.wait(timeout=10)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_lock_mutual_exclusion(draft_version, user_factory):
+    thread_count = 8
+    users = user_factory.create_batch(thread_count)
+    barrier = threading.Barrier(thread_count)
+    holders = []
+    holders_lock = threading.Lock()
+    max_holders = 0
+    acquired = 0
+
+    def contend(user):
+        nonlocal max_holders, acquired
+        try:
+            draft = DraftVersion.objects.get(pk=draft_version.pk)
+            barrier.wait()
+            for _ in range(20):
+                try:
+                    draft.lock(user)
+                except ValidationError:
+                    continue
+                with holders_lock:
+                    holders.append(user)
+                    max_holders = max(max_holders, len(holders))
+                    acquired += 1
+                time.sleep(0.001)
+                with holders_lock:
+                    holders.remove(user)
+                draft.unlock(user)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=thread_count) as executor:
+        list(executor.map(contend, users))
+
+    assert max_holders == 1
+    assert acquired > 1
+    draft_version.refresh_from_db()
+    assert draft_version.locked_by is None
+
+
 # API Tests
 
 
@@ -88,6 +236,44 @@ def test_lock_rest(api_client, dandiset, user):
     }
 
 
+@pytest.mark.django_db
+def test_lock_rest_renew(api_client, dandiset, user_factory):
+    user1 = user_factory()
+    user2 = user_factory()
+    assign_perm('owner', user1, dandiset.draft_version)
+    assign_perm('owner', user2, dandiset.draft_version)
+    dandiset.draft_version.lock(user1, lease=datetime.timedelta(minutes=1))
+    api_client.force_authenticate(user=user1)
+
+    # The holder extends the lease by locking again
+    resp = api_client.post(f'/api/dandisets/{dandiset.identifier}/draft/lock/')
+
+    assert resp.status_code == 200
+    assert resp.data['locked_by'] == {'username': user1.username}
+    dandiset.draft_version.refresh_from_db()
+    assert dandiset.draft_version.locked_until > timezone.now() + datetime.timedelta(minutes=30)
+
+    api_client.force_authenticate(user=user2)
+    resp = api_client.post(f'/api/dandisets/{dandiset.identifier}/draft/lock/')
+
+    assert resp.status_code == 400
+    assert resp.data == ['Draft is locked']
+
+
+@pytest.mark.django_db
+def test_lock_rest_publish_not_renewed(api_client, dandiset, user):
+    assign_perm('owner', user, dandiset.draft_version)
+    dandiset.draft_version.lock(user, lease=datetime.timedelta(minutes=1), publish_task_id='a')
+    api_client.force_authenticate(user=user)
+
+    resp = api_client.post(f'/api/dandisets/{dandiset.identifier}/draft/lock/')
+
+    assert resp.status_code == 400
+    dandiset.draft_version.refresh_from_db()
+    assert dandiset.draft_version.publish_task_id == 'a'
+    assert dandiset.draft_version.locked_until < timezone.now() + datetime.timedelta(minutes=30)
+
+
 @pytest.mark.django_db
 def test_lock_rest_not_owner(api_client, dandiset, user):
     api_client.force_authenticate(user=user)
@@ -114,3 +300,209 @@ def test_unlock_rest(api_client, dandiset, user):
 
     assert not resp.data['locked']
     assert resp.data['locked_by'] is None
+
+
+@pytest.mark.django_db
+def test_publish_rest_locked(api_client, dandiset, user, mocker):
+    apply_async = mocker.patch('dandi.publish.views.draft_version.publish_version.apply_async')
+    assign_perm('owner', user, dandiset.draft_version)
+    api_client.force_authenticate(user=user)
+
+    resp = api_client.post(f'/api/dandisets/{dandiset.identifier}/draft/publish/')
+    assert resp.status_code == 202
+    task_id = resp.data['task_id']
+    dandiset.draft_version.refresh_from_db()
+    assert dandiset.draft_version.locked_by == user
+    assert dandiset.draft_version.publish_task_id == task_id
+
+    # The lock is saved before the publish is enqueued, so another publish is refused
+    dandiset.draft_version.metadata = {'changed': True}
+    dandiset.draft_version.save()
+    resp = api_client.post(f'/api/dandisets/{dandiset.identifier}/draft/publish/')
+    assert resp.status_code == 400
+    apply_async.assert_called_once_with((dandiset.id, user.id, task_id), task_id=task_id)
+
+
+@pytest.mark.django_db
+def test_publish_rest_queued(api_client, dandiset, user, mocker):
+    mocker.patch('dandi.publish.views.draft_version.publish_version.apply_async')
+    assign_perm('owner', user, dandiset.draft_version)
+    api_client.force_authenticate(user=user)
+
+    api_client.post(f'/api/dandisets/{dandiset.identifier}/draft/publish/')
+
+    # The lock is not released while the publish waits in the queue, before it renews the lock
+    DraftVersion.release_expired_locks()
+    dandiset.draft_version.refresh_from_db()
+    assert dandiset.draft_version.locked_until > (
+        timezone.now() + DraftVersion.PUBLISH_QUEUED_LOCK_LEASE - datetime.timedelta(minutes=1)
+    )
+
+
+@pytest.mark.django_db
+def test_publish_rest_repeated(api_client, dandiset, user, mocker):
+    apply_async = mocker.patch('dandi.publish.views.draft_version.publish_version.apply_async')
+    assign_perm('owner', user, dandiset.draft_version)
+    api_client.force_authenticate(user=user)
+
+    resp = api_client.post(f'/api/dandisets/{dandiset.identifier}/draft/publish/')
+    assert resp.status_code == 202
+    task_id = resp.data['task_id']
+
+    # Publishing the same content again returns the publish in progress
+    resp = api_client.post(f'/api/dandisets/{dandiset.identifier}/draft/publish/')
+    assert resp.status_code == 202
+    assert resp.data == {'task_id': task_id, 'in_progress': True}
+    apply_async.assert_called_once()
+
+    resp = api_client.get(f'/api/dandisets/{dandiset.identifier}/draft/publish/')
+    assert resp.data == {'task_id': task_id, 'in_progress': True}
+
+    dandiset.draft_version.unlock(user)
+    resp = api_client.get(f'/api/dandisets/{dandiset.identifier}/draft/publish/')
+    assert resp.data == {'task_id': None, 'in_progress': False}
+
+
+@pytest.mark.django_db
+def test_publish_rest_idempotency_key(api_client, dandiset, user_factory, mocker):
+    apply_async = mocker.patch('dandi.publish.views.draft_version.publish_version.apply_async')
+    user1, user2 = user_factory.create_batch(2)
+    assign_perm('owner', user1, dandiset.draft_version)
+    assign_perm('owner', user2, dandiset.draft_version)
+    url = f'/api/dandisets/{dandiset.identifier}/draft/publish/'
+
+    api_client.force_authenticate(user=user1)
+    resp = api_client.post(url, HTTP_IDEMPOTENCY_KEY='a')
+    assert resp.status_code == 202
+    task_id = resp.data['task_id']
+
+    assert api_client.post(url, HTTP_IDEMPOTENCY_KEY='a').data['task_id'] == task_id
+    # A different request is not collapsed into the publish in progress
+    assert api_client.post(url, HTTP_IDEMPOTENCY_KEY='b').status_code == 400
+    # Nor is the same request by another user
+    api_client.force_authenticate(user=user2)
+    assert api_client.post(url, HTTP_IDEMPOTENCY_KEY='a').status_code == 400
+
+    apply_async.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_publish_rest_enqueue_failure(api_client, dandiset, user, mocker):
+    mocker.patch(
+        'dandi.publish.views.draft_version.publish_version.apply_async',
+        side_effect=ConnectionError,
+    )
+    assign_perm('owner', user, dandiset.draft_version)
+    api_client.force_authenticate(user=user)
+
+    with pytest.raises(ConnectionError):
+        api_client.post(f'/api/dandisets/{dandiset.identifier}/draft/publish/')
+
+    dandiset.draft_version.refresh_from_db()
+    assert not dandiset.draft_version.locked
+    assert dandiset.draft_version.publish_task_id == ''
+
+
+@pytest.mark.django_db
+def test_publish_rest_retry_expired(api_client, dandiset, user, mocker):
+    apply_async = mocker.patch('dandi.publish.views.draft_version.publish_version.apply_async')
+    girder_client = mocker.patch('dandi.publish.tasks.GirderClient')
+    assign_perm('owner', user, dandiset.draft_version)
+    api_client.force_authenticate(user=user)
+    url = f'/api/dandisets/{dandiset.identifier}/draft/publish/'
+
+    first_task_id = api_client.post(url).data['task_id']
+    # The lease expires while the first publish is queued, and the user publishes again
+    DraftVersion.objects.filter(pk=dandiset.draft_version.pk).update(
+        locked_until=timezone.now() - datetime.timedelta(seconds=1)
+    )
+    DraftVersion.release_expired_locks()
+    second_task_id = api_client.post(url).data['task_id']
+    assert second_task_id != first_task_id
+    assert apply_async.call_count == 2
+
+    # The first publish no longer holds the lock, so it does nothing
+    tasks.publish_version(dandiset.id, user.id, first_task_id)
+
+    girder_client.assert_not_called()
+    dandiset.draft_version.refresh_from_db()
+    assert dandiset.draft_version.locked_by == user
+    assert dandiset.draft_version.publish_task_id == second_task_id
+
+
+@pytest.mark.django_db
+def test_publish_lock_released_before_start(dandiset, user, mocker):
+    girder_client = mocker.patch('dandi.publish.tasks.GirderClient')
+    task_id, _ = dandiset.draft_version.lock_for_publish(user, 'token')
+    # e.g. the lock was released while the task was redelivered after its worker was lost
+    dandiset.draft_version.unlock(user)
+
+    tasks.publish_version(dandiset.id, user.id, task_id)
+
+    girder_client.assert_not_called()
+    dandiset.draft_version.refresh_from_db()
+    assert not dandiset.draft_version.locked
+
+
+@pytest.fixture
+def publish_girder_client(mock_girder_client, mocker):
+    # A draft folder with two identical files, and no subfolders
+    mocker.patch.object(
+        mock_girder_client,
+        'get_items',
+        return_value=[
+            {'_id': f'{index}' * 24, 'name': f'{index}.nwb', 'meta': {'species': 'mouse'}}
+            for index in range(2)
+        ],
+    )
+    mocker.patch.object(mock_girder_client, 'get_subfolders', return_value=[])
+    mocker.patch('dandi.publish.tasks.GirderClient', return_value=mock_girder_client)
+    return mock_girder_client
+
+
+@pytest.mark.django_db
+def test_publish_version(dandiset_factory, user, publish_girder_client):
+    dandiset = dandiset_factory(draft_folder_id='magic_draft_folder_id')
+    task_id, _ = dandiset.draft_version.lock_for_publish(user, 'token')
+
+    tasks.publish_version(dandiset.id, user.id, task_id)
+
+    version = dandiset.versions.get()
+    file_size = len(b'Fake DANDI file content.Part 2.')
+    assert sorted(version.assets.values_list('path', flat=True)) == ['/0.nwb', '/1.nwb']
+    assert (version.assets_count, version.size) == (2, 2 * file_size)
+    storage = DandisetStorage.objects.get(dandiset=dandiset)
+    # Both assets share a blob
+    assert (storage.logical_size, storage.unique_size) == (2 * file_size, file_size)
+    assert {(facet.facet, facet.value, facet.count) for facet in version.facets.all()} == {
+        ('species', 'mouse', 2)
+    }
+    dandiset.draft_version.refresh_from_db()
+    assert not dandiset.draft_version.locked
+    assert dandiset.draft_version.publish_task_id == ''
+
+
+@pytest.mark.django_db
+def test_publish_version_lock_lost(dandiset_factory, user, publish_girder_client, mocker):
+    dandiset = dandiset_factory(draft_folder_id='magic_draft_folder_id')
+    task_id, _ = dandiset.draft_version.lock_for_publish(user, 'token')
+
+    @contextlib.contextmanager
+    def hold_lost_lock(*args, **kwargs):
+        # e.g. a renewal failed, as the lock expired while the worker was stalled
+        lost = threading.Event()
+        lost.set()
+        yield lost
+
+    mocker.patch.object(DraftVersion, 'hold_lock', hold_lost_lock)
+
+    with pytest.raises(ValidationError, match='The draft lock was lost while publishing'):
+        tasks.publish_version(dandiset.id, user.id, task_id)
+
+    # Everything the publish wrote is rolled back
+    assert not dandiset.versions.exists()
+    assert not Asset.objects.exists()
+    assert not DandisetStorage.objects.filter(dandiset=dandiset).exists()
+    assert not VersionFacet.objects.exists()
+    dandiset.draft_version.refresh_from_db()
+    assert not dandiset.draft_version.locked
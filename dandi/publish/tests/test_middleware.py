@@ -0,0 +1,103 @@
+import json
+import logging
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+import pytest
+from rest_framework.request import Request
+
+from dandi.publish import request_timing, search_cache
+from dandi.publish.middleware import RequestTimingMiddleware
+from dandi.publish.models import Dandiset
+
+
+@pytest.fixture
+def timing_settings(settings):
+    settings.DANDI_REQUEST_TIMING = True
+    settings.DANDI_REQUEST_TIMING_SLOW_DURATION = 60
+    settings.DANDI_REQUEST_TIMING_MAX_QUERIES = 5
+    return settings
+
+
+def test_request_timing_disabled(settings):
+    settings.DANDI_REQUEST_TIMING = False
+    with pytest.raises(MiddlewareNotUsed):
+        RequestTimingMiddleware(lambda request: HttpResponse())
+
+
+def test_request_timing_inactive():
+    # Outside of a request, recording is a no-op
+    request_timing.record_cache(hits=1)
+    request_timing.record_storage_call(1.0)
+
+
+@pytest.mark.django_db
+def test_request_timing(timing_settings, caplog):
+    def view(request):
+        Dandiset.objects.count()
+        request_timing.record_storage_call(0.5)
+        search_request = Request(request)
+        search_cache.get_or_compute(search_request, lambda: 'result')
+        search_cache.get_or_compute(search_request, lambda: 'result')
+        return HttpResponse()
+
+    middleware = RequestTimingMiddleware(view)
+    with caplog.at_level(logging.INFO, logger='dandi.publish.middleware'):
+        response = middleware(RequestFactory().get('/api/search/', {'search': 'request timing'}))
+
+    server_timing = response['Server-Timing']
+    # Each search also queries its cache generation
+    assert 'desc="3 queries"' in server_timing
+    assert 'storage;dur=500.0;desc="1 calls"' in server_timing
+    assert 'cache;desc="1 hits, 1 misses"' in server_timing
+
+    (record,) = caplog.records
+    assert record.levelno == logging.INFO
+    logged = json.loads(record.getMessage())
+    assert logged['path'] == '/api/search/'
+    assert logged['status'] == 200
+    assert logged['db_queries'] == 3
+    assert logged['storage_calls'] == 1
+    assert (logged['cache_hits'], logged['cache_misses']) == (1, 1)
+    assert logged['flags'] == []
+
+
+@pytest.mark.django_db
+def test_request_timing_flags(timing_settings, caplog):
+    timing_settings.DANDI_REQUEST_TIMING_SLOW_DURATION = 0
+
+    def view(request):
+        for _ in range(6):
+            Dandiset.objects.count()
+        return HttpResponse()
+
+    with caplog.at_level(logging.INFO, logger='dandi.publish.middleware'):
+        RequestTimingMiddleware(view)(RequestFactory().get('/api/dandisets/'))
+
+    (record,) = caplog.records
+    assert record.levelno == logging.WARNING
+    assert json.loads(record.getMessage())['flags'] == ['slow', 'too_many_queries']
+
+
+@pytest.mark.django_db
+def test_request_timing_streamed(timing_settings, caplog):
+    def content():
+        # The queries run while the content is consumed, after the view returned
+        for _ in range(2):
+            Dandiset.objects.count()
+            yield b'{}\n'
+
+    middleware = RequestTimingMiddleware(lambda request: StreamingHttpResponse(content()))
+    with caplog.at_level(logging.INFO, logger='dandi.publish.middleware'):
+        response = middleware(RequestFactory().get('/api/dandisets/'))
+        assert 'Server-Timing' not in response
+        assert not caplog.records
+
+        assert b''.join(response.streaming_content) == b'{}\n{}\n'
+        response.close()
+
+    (record,) = caplog.records
+    logged = json.loads(record.getMessage())
+    assert logged['streamed']
+    assert logged['db_queries'] == 2
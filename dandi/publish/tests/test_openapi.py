@@ -0,0 +1,52 @@
+from django.core.management import call_command
+import pytest
+
+from dandi.publish import openapi
+
+
+@pytest.fixture(autouse=True)
+def clear_rendered_schemas():
+    # Like the cache, rendered schemas are kept across tests
+    openapi._rendered_schemas.clear()
+
+
+@pytest.mark.django_db
+def test_openapi_schema(api_client, mocker):
+    render = mocker.spy(openapi.OpenAPIRenderer, 'render')
+
+    resp = api_client.get('/swagger/', {'format': 'openapi'})
+
+    assert resp.status_code == 200
+    assert resp['Content-Type'] == 'application/openapi+json; charset=utf-8'
+    assert resp.json()['info']['title'] == 'DANDI Archive'
+    etag = resp['ETag']
+
+    # The rendered schema is reused
+    resp = api_client.get('/redoc/', {'format': 'openapi'})
+    assert resp.status_code == 200
+    assert resp['ETag'] == etag
+    assert render.call_count == 1
+
+    resp = api_client.get('/swagger/', {'format': 'openapi'}, HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 304
+
+
+@pytest.mark.django_db
+def test_openapi_schema_ui(api_client):
+    resp = api_client.get('/swagger/')
+
+    assert resp.status_code == 200
+    assert resp['Content-Type'] == 'text/html; charset=utf-8'
+
+
+@pytest.mark.django_db
+def test_openapi_schema_file(api_client, settings, tmp_path):
+    schema_file = tmp_path / 'openapi.json'
+    call_command('render_openapi_schema', str(schema_file), url='https://api.dandi.test')
+    settings.DANDI_OPENAPI_SCHEMA_FILE = str(schema_file)
+
+    resp = api_client.get('/swagger/', {'format': 'openapi'})
+
+    assert resp.status_code == 200
+    assert resp.content == schema_file.read_bytes()
+    assert resp.json()['host'] == 'api.dandi.test'
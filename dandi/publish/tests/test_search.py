@@ -1,19 +1,244 @@
 import pytest
 
+from dandi.publish import search_cache
+from dandi.publish.models import VersionFacet
+
+EMPTY_PAGE = {'count': 0, 'next': None, 'previous': None, 'results': []}
+
 
 @pytest.mark.django_db
 def test_search_no_query(api_client):
-    assert api_client.get('/api/search/').data == []
+    assert api_client.get('/api/search/').data == EMPTY_PAGE
 
 
 @pytest.mark.django_db
 def test_search_empty_query(api_client):
-    assert api_client.get('/api/search/', {'search': ''}).data == []
+    assert api_client.get('/api/search/', {'search': ''}).data == EMPTY_PAGE
 
 
 @pytest.mark.django_db
 def test_search_identifier(api_client, version):
-    resp = api_client.get('/api/search/', {'search': version.id}).data
-    assert len(resp) == 1
-    assert resp[0]['version'] == version.version
-    assert resp[0]['name'] == version.name
+    resp = api_client.get('/api/search/', {'search': version.dandiset.identifier}).data
+    assert resp['count'] == 1
+    assert resp['results'][0]['version'] == version.version
+    assert resp['results'][0]['name'] == version.name
+
+
+@pytest.mark.django_db
+def test_search_name(api_client, version_factory):
+    version = version_factory(name='Mouse visual cortex recordings')
+    version_factory(name='Human hippocampus recordings')
+
+    resp = api_client.get('/api/search/', {'search': 'cortex'}).data
+
+    assert [result['version'] for result in resp['results']] == [version.version]
+
+
+@pytest.mark.django_db
+def test_search_keywords(api_client, version_factory):
+    version = version_factory(metadata={'keywords': ['electrophysiology', 'mouse']})
+
+    resp = api_client.get('/api/search/', {'search': 'electrophysiology'}).data
+
+    assert [result['name'] for result in resp['results']] == [version.name]
+
+
+@pytest.mark.django_db
+def test_search_ranked(api_client, version_factory):
+    # A match in the name outranks a match elsewhere in the metadata
+    metadata_match = version_factory(name='Hippocampus', metadata={'species': 'zebrafish'})
+    name_match = version_factory(name='Zebrafish hippocampus', metadata={})
+
+    resp = api_client.get('/api/search/', {'search': 'zebrafish'}).data
+
+    assert [result['name'] for result in resp['results']] == [
+        name_match.name,
+        metadata_match.name,
+    ]
+
+
+@pytest.mark.django_db
+def test_search_paginated(api_client, version_factory):
+    version_factory.create_batch(3, name='Zebrafish')
+
+    resp = api_client.get('/api/search/', {'search': 'zebrafish', 'page_size': 2}).data
+
+    assert resp['count'] == 3
+    assert len(resp['results']) == 2
+    assert resp['next']
+
+
+@pytest.mark.django_db
+def test_search_latest(api_client, dandiset, version_factory):
+    version_factory(dandiset=dandiset, name='Zebrafish')
+    latest = version_factory(dandiset=dandiset, name='Zebrafish')
+
+    resp = api_client.get('/api/search/', {'search': 'zebrafish'}).data
+    assert resp['count'] == 2
+
+    resp = api_client.get('/api/search/', {'search': 'zebrafish', 'latest': 'true'}).data
+    assert [result['version'] for result in resp['results']] == [latest.version]
+
+
+@pytest.mark.django_db
+def test_asset_facet_columns(asset_factory):
+    asset = asset_factory(metadata={'species': 'mouse', 'session_id': 12})
+    asset.refresh_from_db()
+    assert (asset.species, asset.modality, asset.session_id) == ('mouse', None, '12')
+
+    asset.metadata = {'modality': 'ecephys'}
+    asset.save(update_fields=['metadata'])
+    asset.refresh_from_db()
+    assert (asset.species, asset.modality, asset.session_id) == (None, 'ecephys', None)
+
+
+@pytest.mark.django_db
+def test_version_facet_populate(version, asset_factory):
+    asset_factory.create_batch(2, version=version, metadata={'species': 'mouse'})
+    asset_factory(version=version, metadata={'species': 'rat', 'modality': 'ecephys'})
+    asset_factory(version=version, metadata={})
+
+    VersionFacet.populate(version)
+
+    assert {(facet.facet, facet.value, facet.count) for facet in version.facets.all()} == {
+        ('species', 'mouse', 2),
+        ('species', 'rat', 1),
+        ('modality', 'ecephys', 1),
+    }
+
+
+@pytest.mark.django_db
+def test_asset_search(api_client, version_factory, asset_factory):
+    mouse_version = version_factory()
+    asset_factory(version=mouse_version, metadata={'species': 'mouse', 'modality': 'ecephys'})
+    asset_factory(version=mouse_version, metadata={'species': 'rat', 'modality': 'ecephys'})
+    rat_version = version_factory()
+    asset_factory(version=rat_version, metadata={'species': 'rat', 'modality': 'ophys'})
+    for version in [mouse_version, rat_version]:
+        VersionFacet.populate(version)
+
+    resp = api_client.get('/api/search/assets/', {'species': 'mouse'}).data
+
+    assert [result['version'] for result in resp['results']] == [mouse_version.version]
+    assert resp['facets'] == {
+        'species': [{'value': 'mouse', 'count': 1}, {'value': 'rat', 'count': 1}],
+        'modality': [{'value': 'ecephys', 'count': 2}],
+        'session_id': [],
+    }
+
+    resp = api_client.get('/api/search/assets/').data
+
+    assert resp['count'] == 2
+    assert resp['facets']['species'] == [
+        {'value': 'rat', 'count': 2},
+        {'value': 'mouse', 'count': 1},
+    ]
+
+    # Every filter must match the same asset
+    resp = api_client.get('/api/search/assets/', {'species': 'rat', 'modality': 'ophys'}).data
+
+    assert [result['version'] for result in resp['results']] == [rat_version.version]
+
+
+@pytest.mark.django_db
+def test_asset_search_non_string_facets(api_client, version, asset_factory):
+    long_value = 'x' * (VersionFacet.VALUE_MAX_LENGTH + 10)
+    asset_factory(version=version, metadata={'session_id': 12, 'species': long_value})
+    VersionFacet.populate(version)
+
+    resp = api_client.get('/api/search/assets/').data
+    assert resp['facets']['session_id'] == [{'value': '12', 'count': 1}]
+    assert resp['facets']['species'] == [
+        {'value': long_value[: VersionFacet.VALUE_MAX_LENGTH], 'count': 1}
+    ]
+
+    # Facet values are matched as they are listed
+    for params in [
+        {'session_id': '12'},
+        {'species': long_value},
+        {'species': resp['facets']['species'][0]['value']},
+        {'session_id': '12', 'species': long_value},
+    ]:
+        assert api_client.get('/api/search/assets/', params).data['count'] == 1
+    assert api_client.get('/api/search/assets/', {'session_id': '13'}).data['count'] == 0
+
+
+@pytest.mark.django_db
+def test_search_cache(api_client, version_factory):
+    version_factory(name='Zebrafish')
+
+    assert api_client.get('/api/search/', {'search': 'Zebrafish'}).data['count'] == 1
+    assert api_client.get('/api/search/', {'search': ' zebrafish '}).data['count'] == 1
+    assert api_client.get('/api/search/cache/').data == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+
+    # A new Version is not visible until its publish commits, which invalidates the cache
+    version_factory(name='Zebrafish')
+    assert api_client.get('/api/search/', {'search': 'zebrafish'}).data['count'] == 1
+
+    search_cache.invalidate()
+
+    assert api_client.get('/api/search/', {'search': 'zebrafish'}).data['count'] == 2
+
+
+@pytest.mark.django_db
+def test_search_cache_generation(django_assert_num_queries):
+    assert search_cache.get_generation() == 0
+
+    search_cache.invalidate()
+    search_cache.invalidate()
+
+    # The generation is a single row, read by primary key
+    with django_assert_num_queries(1):
+        assert search_cache.get_generation() == 2
+
+
+@pytest.mark.django_db
+def test_version_keywords(version_factory):
+    version = version_factory(metadata={'keywords': ['mouse', ' Mouse ', '', 'cortex', 'mouse']})
+
+    assert sorted(version.keywords.values_list('keyword', flat=True)) == [
+        'Mouse',
+        'cortex',
+        'mouse',
+    ]
+
+
+@pytest.mark.django_db
+def test_suggest(api_client, version_factory):
+    version_factory(name='Visual cortex of the mouse', metadata={'keywords': ['motor cortex']})
+    version_factory(name='Mouse hippocampus', metadata={'keywords': ['mouse']})
+
+    resp = api_client.get('/api/search/suggest/', {'q': 'mou'}).data
+
+    # Prefix matches come first, then similar words, without duplicates
+    assert resp[:2] == [
+        {'value': 'Mouse hippocampus', 'type': 'name'},
+        {'value': 'mouse', 'type': 'keyword'},
+    ]
+    assert {'value': 'Visual cortex of the mouse', 'type': 'name'} in resp[2:]
+
+
+@pytest.mark.django_db
+def test_suggest_limit(api_client, version_factory):
+    for i in range(3):
+        version_factory(name=f'Zebrafish {i}')
+
+    resp = api_client.get('/api/search/suggest/', {'q': 'zebra', 'limit': 2}).data
+
+    assert resp == [
+        {'value': 'Zebrafish 0', 'type': 'name'},
+        {'value': 'Zebrafish 1', 'type': 'name'},
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query', ['', 'z'])
+def test_suggest_short_query(api_client, version_factory, query):
+    version_factory(name='Zebrafish')
+
+    assert api_client.get('/api/search/suggest/', {'q': query}).data == []
+
+
+@pytest.mark.django_db
+def test_suggest_invalid_limit(api_client):
+    assert api_client.get('/api/search/suggest/', {'q': 'zebra', 'limit': 'ten'}).status_code == 400
@@ -1,5 +1,14 @@
+import datetime
+import threading
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.utils import timezone
 import pytest
 
+from dandi.publish.models import ArchiveStats, Dandiset, DandisetStorage, StatsSnapshot, Version
+from dandi.publish.tasks import reconcile_archive_stats, record_stats_snapshot
+
 
 @pytest.mark.django_db
 def test_stats_baseline(api_client):
@@ -9,6 +18,7 @@ def test_stats_baseline(api_client):
         # django-guardian automatically creates an AnonymousUser
         'user_count': 1,
         'size': 0,
+        'unique_size': 0,
     }
 
 
@@ -41,3 +51,150 @@ def test_stats_asset(api_client, asset):
     stats = api_client.get('/api/stats/').data
 
     assert stats['size'] == asset.size
+
+
+@pytest.mark.django_db
+def test_stats_cache_control(api_client):
+    resp = api_client.get('/api/stats/')
+
+    assert resp['Cache-Control'] == 'public, max-age=60'
+
+
+@pytest.mark.django_db
+def test_stats_incremental(api_client, dandiset_factory, version_factory, asset_factory, user):
+    # Compute the initial statistics
+    api_client.get('/api/stats/')
+    reconciled = ArchiveStats.objects.get().reconciled
+
+    dandiset_factory()
+    version = version_factory()
+    asset = asset_factory(version=version)
+    # A second Version of the same Dandiset is not counted again
+    second_version = version_factory(dandiset=version.dandiset)
+    user.delete()
+
+    # Published Versions are only accounted for at the end of publishing
+    assert api_client.get('/api/stats/').data['published_dandiset_count'] == 0
+    DandisetStorage.add_version(version)
+    DandisetStorage.add_version(second_version)
+
+    # Nothing was recomputed
+    assert ArchiveStats.objects.get().reconciled == reconciled
+    assert api_client.get('/api/stats/').data == {
+        'dandiset_count': 2,
+        'published_dandiset_count': 1,
+        'user_count': 1,
+        'size': asset.size,
+        'unique_size': asset.size,
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stats_not_locked_by_publish(version_factory, user_factory):
+    ArchiveStats.get()
+    version_created = threading.Event()
+    publish_done = threading.Event()
+
+    def publish():
+        try:
+            # Like a publish, which creates its Version long before its transaction commits
+            with transaction.atomic():
+                version_factory()
+                version_created.set()
+                publish_done.wait(timeout=10)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=publish)
+    thread.start()
+    try:
+        assert version_created.wait(timeout=10)
+        # Creating a user updates the statistics, which must not wait for the publish
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SET LOCAL lock_timeout = '1s'")
+            user_factory()
+    finally:
+        publish_done.set()
+        thread.join()
+
+
+@pytest.mark.django_db
+def test_stats_reconcile(api_client, version):
+    ArchiveStats.get()
+    ArchiveStats.objects.update(dandiset_count=10, published_dandiset_count=10, size=10)
+
+    reconcile_archive_stats()
+
+    assert api_client.get('/api/stats/').data['dandiset_count'] == 1
+    assert api_client.get('/api/stats/').data['published_dandiset_count'] == 1
+    assert api_client.get('/api/stats/').data['size'] == version.size
+
+
+@pytest.mark.django_db
+def test_stats_snapshot_record(version, dandiset_factory):
+    record_stats_snapshot()
+    dandiset_factory()
+    # Recording again on the same day replaces the snapshot
+    record_stats_snapshot()
+
+    snapshot = StatsSnapshot.objects.get()
+    assert snapshot.date == timezone.localdate()
+    assert snapshot.dandiset_count == 2
+    assert snapshot.published_dandiset_count == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'interval,dates',
+    [
+        ('day', ['2020-01-30', '2020-01-31', '2020-02-01', '2021-03-01']),
+        ('month', ['2020-01-31', '2020-02-01', '2021-03-01']),
+        ('year', ['2020-02-01', '2021-03-01']),
+    ],
+)
+def test_stats_history(api_client, interval, dates):
+    for i, date in enumerate(['2020-01-30', '2020-01-31', '2020-02-01', '2021-03-01']):
+        StatsSnapshot.objects.create(
+            date=date, dandiset_count=i, published_dandiset_count=i, user_count=i, size=i
+        )
+
+    resp = api_client.get('/api/stats/history/', {'interval': interval})
+
+    assert [snapshot['date'] for snapshot in resp.data] == dates
+    assert resp['Cache-Control'] == 'public, max-age=3600'
+
+
+@pytest.mark.django_db
+def test_stats_history_invalid_interval(api_client):
+    assert api_client.get('/api/stats/history/', {'interval': 'hour'}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_stats_snapshot_backfill(version_factory, asset_factory):
+    today = timezone.localdate()
+    old = version_factory()
+    asset = asset_factory(version=old)
+    three_days_ago = timezone.now() - datetime.timedelta(days=3)
+    Dandiset.objects.filter(pk=old.dandiset_id).update(created=three_days_ago)
+    Version.objects.filter(pk=old.pk).update(created=three_days_ago)
+    # Changes of today are left to the periodic task
+    version_factory()
+    # Existing snapshots are kept
+    StatsSnapshot.objects.create(
+        date=today - datetime.timedelta(days=1),
+        dandiset_count=0,
+        published_dandiset_count=0,
+        user_count=0,
+        size=0,
+    )
+
+    call_command('backfill_stats_snapshots', batch_size=2)
+
+    assert [
+        (snapshot.date, snapshot.dandiset_count, snapshot.published_dandiset_count, snapshot.size)
+        for snapshot in StatsSnapshot.objects.all()
+    ] == [
+        (today - datetime.timedelta(days=3), 1, 1, asset.size),
+        (today - datetime.timedelta(days=2), 1, 1, asset.size),
+        (today - datetime.timedelta(days=1), 0, 0, 0),
+    ]
@@ -1,4 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import json
+import threading
+
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
 import pytest
 
 from dandi.publish.models import Version
@@ -25,6 +32,36 @@ def test_version_make_version_save(mocker, dandiset, version_factory):
     assert version_1.version != version_str_2
 
 
+@pytest.mark.django_db
+def test_version_make_version_after_latest(dandiset, version_factory):
+    # A Version from the future must still be followed by a later one
+    future = datetime.datetime.utcnow() + datetime.timedelta(days=1)
+    version_factory(dandiset=dandiset, version=Version.datetime_to_version(future))
+
+    assert Version.make_version(dandiset) == Version.datetime_to_version(
+        future + datetime.timedelta(minutes=1)
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_version_make_version_concurrent(dandiset, version_factory):
+    publish_count = 10
+    barrier = threading.Barrier(publish_count)
+
+    def publish(_):
+        try:
+            barrier.wait()
+            return version_factory(dandiset=dandiset).version
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=publish_count) as executor:
+        versions = list(executor.map(publish, range(publish_count)))
+
+    assert len(set(versions)) == publish_count
+    assert Version.objects.filter(dandiset=dandiset).count() == publish_count
+
+
 @pytest.mark.django_db
 def test_version_from_girder(dandiset_factory, mock_girder_client):
     dandiset = dandiset_factory(draft_folder_id='magic_draft_folder_id')
@@ -42,6 +79,32 @@ def test_version_from_girder_no_metadata(dandiset_factory, mock_girder_client):
         Version.from_girder(dandiset, mock_girder_client)
 
 
+@pytest.mark.django_db
+def test_version_update_asset_stats(version, asset_factory):
+    assets = asset_factory.create_batch(3, version=version)
+
+    version.update_asset_stats()
+    version.refresh_from_db()
+
+    assert version.assets_count == 3
+    assert version.size == sum(asset.size for asset in assets)
+
+
+@pytest.mark.django_db
+def test_version_backfill_stats(version_factory, asset_factory):
+    versions = version_factory.create_batch(3)
+    for i, version in enumerate(versions):
+        asset_factory.create_batch(i, version=version)
+    Version.objects.update(assets_count=0, size=0)
+
+    call_command('backfill_version_stats', batch_size=2)
+
+    for i, version in enumerate(versions):
+        version.refresh_from_db()
+        assert version.assets_count == i
+        assert version.size == sum(asset.size for asset in version.assets.all())
+
+
 @pytest.mark.django_db
 def test_version_rest_list(api_client, version):
     assert api_client.get(f'/api/dandisets/{version.dandiset.identifier}/versions/').data == {
@@ -66,6 +129,20 @@ def test_version_rest_list(api_client, version):
     }
 
 
+@pytest.mark.django_db
+def test_version_rest_list_num_queries(
+    api_client, django_assert_num_queries, dandiset, version_factory, asset_factory
+):
+    for version in version_factory.create_batch(3, dandiset=dandiset):
+        asset_factory.create_batch(2, version=version)
+
+    # One query to count, and one for the page
+    with django_assert_num_queries(2):
+        resp = api_client.get(f'/api/dandisets/{dandiset.identifier}/versions/')
+
+    assert [result['assets_count'] for result in resp.data['results']] == [2, 2, 2]
+
+
 @pytest.mark.django_db
 def test_version_rest_retrieve(api_client, version):
     assert api_client.get(
@@ -84,3 +161,77 @@ def test_version_rest_retrieve(api_client, version):
         'size': 0,
         'metadata': version.metadata,
     }
+
+
+@pytest.mark.django_db
+def test_version_rest_retrieve_cache_headers(api_client, version):
+    resp = api_client.get(
+        f'/api/dandisets/{version.dandiset.identifier}/versions/{version.version}/'
+    )
+
+    assert resp.status_code == 200
+    assert resp['ETag']
+    assert 'public' in resp['Cache-Control']
+    # The embedded Dandiset may change, so the response must be revalidated
+    assert 'immutable' not in resp['Cache-Control']
+    assert 'max-age=60' in resp['Cache-Control']
+
+
+@pytest.mark.django_db
+def test_version_rest_retrieve_not_modified(api_client, version):
+    url = f'/api/dandisets/{version.dandiset.identifier}/versions/{version.version}/'
+    etag = api_client.get(url)['ETag']
+
+    resp = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert resp.status_code == 304
+    assert resp['ETag'] == etag
+    assert 'public' in resp['Cache-Control']
+
+
+@pytest.mark.django_db
+def test_version_rest_retrieve_dandiset_modified(api_client, version):
+    url = f'/api/dandisets/{version.dandiset.identifier}/versions/{version.version}/'
+    etag = api_client.get(url)['ETag']
+
+    # e.g. synced from Girder
+    version.dandiset.save()
+
+    resp = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200
+    assert resp['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_version_rest_diff(api_client, dandiset, version_factory, asset_factory):
+    old_version = version_factory(dandiset=dandiset)
+    new_version = version_factory(dandiset=dandiset)
+    asset_factory(version=old_version, path='/a.nwb', sha256='a' * 64)
+    asset_factory(version=new_version, path='/a.nwb', sha256='a' * 64)
+    asset_factory(version=old_version, path='/b.nwb', sha256='b' * 64)
+    asset_factory(version=new_version, path='/b.nwb', sha256='c' * 64)
+    asset_factory(version=old_version, path='/c.nwb', sha256='d' * 64)
+    asset_factory(version=new_version, path='/d.nwb', sha256='e' * 64)
+
+    resp = api_client.get(
+        f'/api/dandisets/{dandiset.identifier}/versions/{old_version.version}/'
+        f'diff/{new_version.version}/'
+    )
+
+    assert resp.status_code == 200
+    assert resp['Content-Type'] == 'application/x-ndjson'
+    assert [json.loads(line) for line in b''.join(resp.streaming_content).splitlines()] == [
+        {'change': 'modified', 'path': '/b.nwb', 'sha256': 'c' * 64, 'old_sha256': 'b' * 64},
+        {'change': 'removed', 'path': '/c.nwb', 'sha256': 'd' * 64},
+        {'change': 'added', 'path': '/d.nwb', 'sha256': 'e' * 64},
+    ]
+
+
+@pytest.mark.django_db
+def test_version_rest_diff_not_found(api_client, version):
+    resp = api_client.get(
+        f'/api/dandisets/{version.dandiset.identifier}/versions/{version.version}/'
+        f'diff/0.000101.0000/'
+    )
+
+    assert resp.status_code == 404
@@ -1,25 +1,36 @@
 from .asset import AssetViewSet
 from .dandiset import DandisetViewSet
 from .draft_version import (
+    DraftVersionViewSet,
     draft_lock_view,
     draft_owners_view,
     draft_publish_view,
     draft_unlock_view,
     draft_view,
 )
-from .search import search_view
-from .stats import stats_view
-from .version import VersionViewSet
+from .girder import girder_events_view
+from .metrics import storage_metrics_view
+from .search import asset_search_view, search_cache_view, search_view, suggest_view
+from .stats import stats_history_view, stats_view
+from .version import VersionViewSet, version_diff_view
 
 __all__ = [
     'AssetViewSet',
     'DandisetViewSet',
+    'DraftVersionViewSet',
     'VersionViewSet',
     'draft_view',
     'draft_lock_view',
     'draft_unlock_view',
     'draft_publish_view',
     'draft_owners_view',
+    'girder_events_view',
     'search_view',
+    'asset_search_view',
+    'search_cache_view',
+    'suggest_view',
     'stats_view',
+    'storage_metrics_view',
+    'stats_history_view',
+    'version_diff_view',
 ]
@@ -1,4 +1,5 @@
 from django.http import HttpResponseRedirect
+from django.utils.decorators import method_decorator
 from django_filters import rest_framework as filters
 from rest_framework import serializers
 from rest_framework.decorators import action
@@ -8,7 +9,7 @@ from rest_framework.viewsets import ReadOnlyModelViewSet
 from rest_framework_extensions.mixins import NestedViewSetMixin
 
 from dandi.publish.models import Asset
-from dandi.publish.views.common import DandiPagination
+from dandi.publish.views.common import DandiPagination, published_version_cache
 from dandi.publish.views.version import VersionSerializer
 
 
@@ -30,6 +31,11 @@ class AssetSerializer(serializers.ModelSerializer):
     version = VersionSerializer()
 
 
+published_version_cache_method = method_decorator(
+    published_version_cache('version__dandiset__pk', 'version__version')
+)
+
+
 class AssetFilter(filters.FilterSet):
     path = filters.CharFilter(lookup_expr='istartswith')
 
@@ -51,12 +57,21 @@ class AssetViewSet(NestedViewSetMixin, ReadOnlyModelViewSet):
     filter_backends = [filters.DjangoFilterBackend]
     filterset_class = AssetFilter
 
+    @published_version_cache_method
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @published_version_cache_method
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(detail=True, methods=['GET'])
     def download(self, request, **kwargs):
         """Return a redirect to the file download in the object store."""
         return HttpResponseRedirect(redirect_to=self.get_object().blob.url)
 
     @action(detail=False, methods=['GET'])
+    @published_version_cache_method
     def paths(self, request, **kwargs):
         """
         Return the unique files/directories that directly reside under the specified path.
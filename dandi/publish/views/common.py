@@ -1,7 +1,84 @@
+from functools import wraps
+import hashlib
+
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+from rest_framework import serializers
 from rest_framework.pagination import PageNumberPagination
 
+from dandi.publish.models import Version
+
+# Published content never changes, but its representation includes the Dandiset, which does, so
+# caches must revalidate it soon; revalidating is cheap with the ETag
+PUBLISHED_MAX_AGE = 60
+
 
 class DandiPagination(PageNumberPagination):
     page_size = 25
     max_page_size = 100
     page_size_query_param = 'page_size'
+
+
+class UserSerializer(serializers.Serializer):
+    username = serializers.CharField(
+        min_length=1,
+        max_length=150,
+        help_text=('Required. 150 characters or fewer. Letters, digits and @/./+/-/_ only.'),
+        validators=[UnicodeUsernameValidator()],
+    )
+
+
+class LockHolderSerializer(UserSerializer):
+    """The user holding the lock of a draft, or null once the lock has expired."""
+
+    def get_attribute(self, instance):
+        return instance.locked_by if instance.locked else None
+
+
+def published_version_cache(dandiset_kwarg: str, version_kwarg: str):
+    """
+    Decorate a view of content belonging to a published Version.
+
+    Published Versions are immutable, but their representations embed their Dandiset, which is
+    not. Responses get a strong ETag and are marked as cacheable for a short time by any
+    intermediate cache. Conditional requests are answered with a 304, without invoking the view.
+    """
+
+    def etag_func(request, *args, **kwargs):
+        modified = (
+            Version.objects.filter(
+                dandiset__pk=kwargs[dandiset_kwarg], version=kwargs[version_kwarg]
+            )
+            .values_list('modified', 'dandiset__modified')
+            .first()
+        )
+        if modified is None:
+            return None
+        version_modified, dandiset_modified = modified
+        # The representation is fully determined by the URL (including the query string, for
+        # pagination and filtering), the negotiated format, the Version and its Dandiset
+        key = '|'.join(
+            [
+                request.get_full_path(),
+                request.META.get('HTTP_ACCEPT', ''),
+                version_modified.isoformat(),
+                dandiset_modified.isoformat(),
+            ]
+        )
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def decorator(view_func):
+        conditional_view_func = condition(etag_func=etag_func)(view_func)
+
+        @wraps(view_func)
+        def inner(request, *args, **kwargs):
+            response = conditional_view_func(request, *args, **kwargs)
+            if response.status_code in [200, 304]:
+                patch_cache_control(response, public=True, max_age=PUBLISHED_MAX_AGE)
+                patch_vary_headers(response, ['Accept'])
+            return response
+
+        return inner
+
+    return decorator
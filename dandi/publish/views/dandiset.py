@@ -1,4 +1,7 @@
+from django.db.models import Prefetch
 from django.http import Http404
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema, swagger_serializer_method
 from rest_framework import serializers, status
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
@@ -6,9 +9,12 @@ from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
-from dandi.publish.girder import GirderClient
-from dandi.publish.models import Dandiset
-from dandi.publish.views.common import DandiPagination
+from dandi.publish.models import Dandiset, DandisetStorage, DraftVersion, Version
+from dandi.publish.tasks import sync_dandisets
+from dandi.publish.views.common import DandiPagination, LockHolderSerializer
+
+# The maximum number of folders synced by one request
+SYNC_MAX_FOLDERS = 1000
 
 
 class DandisetSerializer(serializers.ModelSerializer):
@@ -22,11 +28,70 @@ class DandisetSerializer(serializers.ModelSerializer):
         read_only_fields = ['created']
 
 
+class DandisetDraftVersionSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DraftVersion
+        fields = ['name', 'modified', 'locked', 'locked_by']
+
+    locked_by = LockHolderSerializer()
+
+
+class DandisetVersionSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Version
+        fields = ['version', 'name', 'created', 'assets_count', 'size']
+
+
+class DandisetDetailSerializer(DandisetSerializer):
+    class Meta(DandisetSerializer.Meta):
+        fields = DandisetSerializer.Meta.fields + ['draft_version', 'most_recent_version']
+
+    draft_version = DandisetDraftVersionSummarySerializer()
+    most_recent_version = serializers.SerializerMethodField()
+
+    @swagger_serializer_method(serializer_or_field=DandisetVersionSummarySerializer)
+    def get_most_recent_version(self, dandiset):
+        # This is prefetched for all Dandisets at once by DandisetViewSet
+        versions = dandiset.most_recent_versions
+        return DandisetVersionSummarySerializer(versions[0]).data if versions else None
+
+
+class DandisetStorageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DandisetStorage
+        fields = ['logical_size', 'unique_size', 'duplicate_size']
+
+
+class DandisetSyncSerializer(serializers.Serializer):
+    folder_ids = serializers.ListField(
+        child=serializers.RegexField(f'^{Dandiset.GIRDER_ID_REGEX}$'),
+        min_length=1,
+        max_length=SYNC_MAX_FOLDERS,
+    )
+
+
 class DandisetViewSet(ReadOnlyModelViewSet):
-    queryset = Dandiset.objects.all()
+    # The summaries of the draft and the most recent Version are embedded, so a page is fetched in
+    # a constant number of queries: the draft is joined, and the most recent Version of every
+    # Dandiset on the page is fetched by one more query
+    queryset = (
+        Dandiset.objects.all()
+        .select_related('draft_version__locked_by')
+        .defer('draft_version__metadata')
+        .prefetch_related(
+            Prefetch(
+                'versions',
+                queryset=Version.objects.select_related(None)
+                .order_by('dandiset_id', '-version')
+                .distinct('dandiset_id')
+                .defer('metadata', 'search_vector'),
+                to_attr='most_recent_versions',
+            )
+        )
+    )
 
     permission_classes = [IsAuthenticatedOrReadOnly]
-    serializer_class = DandisetSerializer
+    serializer_class = DandisetDetailSerializer
     pagination_class = DandiPagination
 
     lookup_value_regex = Dandiset.IDENTIFIER_REGEX
@@ -46,12 +111,45 @@ class DandisetViewSet(ReadOnlyModelViewSet):
 
         return super().get_object()
 
+    @action(detail=True, methods=['GET'], serializer_class=DandisetStorageSerializer)
+    def storage(self, request, **kwargs):
+        """
+        Return the storage used by all published versions of a dandiset.
+
+        Assets with identical content (by SHA256) are counted once in the unique size.
+        """
+        dandiset = self.get_object()
+        try:
+            storage = dandiset.storage
+        except DandisetStorage.DoesNotExist:
+            # Nothing was published yet
+            storage = DandisetStorage(dandiset=dandiset)
+        return Response(DandisetStorageSerializer(storage).data)
+
     @action(detail=False, methods=['POST'], serializer_class=None)
     def sync(self, request):
         if 'folder-id' not in request.query_params:
             raise ValidationError('Missing query parameter "folder-id"')
         draft_folder_id = request.query_params['folder-id']
 
-        with GirderClient() as client:
-            Dandiset.from_girder(draft_folder_id, client)
+        # Syncing waits on Girder, so it's done in the background
+        sync_dandisets.delay([draft_folder_id])
         return Response('', status=status.HTTP_202_ACCEPTED)
+
+    @swagger_auto_schema(
+        request_body=DandisetSyncSerializer,
+        responses={
+            202: openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={'task_id': openapi.Schema(type=openapi.TYPE_STRING)},
+            )
+        },
+    )
+    @action(detail=False, methods=['POST'], url_path='sync/bulk', serializer_class=None)
+    def bulk_sync(self, request):
+        """Sync many dandisets from their Girder draft folders, in the background."""
+        serializer = DandisetSyncSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        result = sync_dandisets.delay(serializer.validated_data['folder_ids'])
+        return Response({'task_id': result.id}, status=status.HTTP_202_ACCEPTED)
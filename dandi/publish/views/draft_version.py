@@ -1,28 +1,31 @@
+import contextlib
+import hashlib
+
 from django.contrib.auth.models import User
-from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+from django_filters import rest_framework as filters
+from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from guardian.decorators import permission_required_or_403
 from rest_framework import serializers, status
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.mixins import ListModelMixin
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from rest_framework.serializers import ValidationError
+from rest_framework.viewsets import GenericViewSet
 
 from dandi.publish.models import Dandiset, DraftVersion
 from dandi.publish.tasks import publish_version
+from dandi.publish.views.common import DandiPagination, LockHolderSerializer, UserSerializer
 from dandi.publish.views.dandiset import DandisetSerializer
 
 
-class UserSerializer(serializers.Serializer):
-    username = serializers.CharField(
-        min_length=1,
-        max_length=150,
-        help_text=('Required. 150 characters or fewer. Letters, digits and @/./+/-/_ only.'),
-        validators=[UnicodeUsernameValidator()],
-    )
-
-
 class DraftVersionSerializer(serializers.ModelSerializer):
     class Meta:
         model = DraftVersion
@@ -38,7 +41,7 @@ class DraftVersionSerializer(serializers.ModelSerializer):
         read_only_fields = ['created']
 
     dandiset = DandisetSerializer()
-    locked_by = UserSerializer()
+    locked_by = LockHolderSerializer()
     owners = UserSerializer(many=True)
 
 
@@ -47,21 +50,139 @@ class DraftVersionDetailSerializer(DraftVersionSerializer):
         fields = DraftVersionSerializer.Meta.fields + ['metadata']
 
 
+class DraftVersionCursorPagination(CursorPagination):
+    # Drafts are keyed by their dandiset, so this is the stable order of dandiset identifiers
+    ordering = 'pk'
+    page_size = DandiPagination.page_size
+    max_page_size = DandiPagination.max_page_size
+    page_size_query_param = DandiPagination.page_size_query_param
+
+
+class DraftVersionFilter(filters.FilterSet):
+    owner = filters.CharFilter(method='filter_owner', help_text='Username of an owner')
+    locked = filters.BooleanFilter(method='filter_locked')
+    locked_by = filters.CharFilter(
+        method='filter_locked_by', help_text='Username of the lock holder'
+    )
+
+    class Meta:
+        model = DraftVersion
+        fields = ['owner', 'locked', 'locked_by']
+
+    def filter_owner(self, queryset, name, value):
+        return queryset.filter(DraftVersion.owned_by(value))
+
+    def filter_locked(self, queryset, name, value):
+        locked = DraftVersion.locked_condition()
+        return queryset.filter(locked) if value else queryset.exclude(locked)
+
+    def filter_locked_by(self, queryset, name, value):
+        # A user whose lock has expired doesn't hold it anymore
+        return queryset.filter(DraftVersion.locked_condition(), locked_by__username=value)
+
+
+class DraftVersionViewSet(ListModelMixin, GenericViewSet):
+    """List the drafts of all dandisets."""
+
+    queryset = DraftVersion.objects.select_related('dandiset', 'locked_by').defer('metadata')
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    serializer_class = DraftVersionSerializer
+    pagination_class = DraftVersionCursorPagination
+
+    filter_backends = [filters.DjangoFilterBackend]
+    filterset_class = DraftVersionFilter
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        # Fetch the owners of the whole page at once, rather than for each draft
+        DraftVersion.prefetch_owners(page)
+        return page
+
+
+@contextlib.contextmanager
+def _validation_error_as_400():
+    # Locking errors are raised by the model, which DRF would otherwise report as a server error
+    try:
+        yield
+    except DjangoValidationError as e:
+        raise ValidationError(e.messages)
+
+
+def _draft_validators(request, dandiset__pk):
+    # Both validators are computed from the same row, so it's only fetched once per request
+    if not hasattr(request, '_draft_validators'):
+        request._draft_validators = (
+            DraftVersion.objects.filter(dandiset__pk=dandiset__pk)
+            .values('modified', 'locked_until', 'dandiset__modified')
+            .first()
+        )
+    return request._draft_validators
+
+
+def _lock_expired(draft) -> bool:
+    return draft['locked_until'] is not None and draft['locked_until'] <= timezone.now()
+
+
+def _draft_etag(request, dandiset__pk):
+    draft = _draft_validators(request, dandiset__pk)
+    if draft is None:
+        return None
+    # The representation is determined by the URL, the negotiated format, the draft (including
+    # its lock, which changes when it expires) and its Dandiset
+    key = '|'.join(
+        [
+            request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', ''),
+            draft['modified'].isoformat(),
+            draft['locked_until'].isoformat() if draft['locked_until'] else '',
+            str(_lock_expired(draft)),
+            draft['dandiset__modified'].isoformat(),
+        ]
+    )
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _draft_last_modified(request, dandiset__pk):
+    draft = _draft_validators(request, dandiset__pk)
+    if draft is None:
+        return None
+    # A lock which expired changed the representation, without modifying the draft
+    if _lock_expired(draft):
+        return max(draft['modified'], draft['locked_until'])
+    return draft['modified']
+
+
+@condition(etag_func=_draft_etag, last_modified_func=_draft_last_modified)
 @api_view()
 @permission_classes([IsAuthenticatedOrReadOnly])
 def draft_view(request, dandiset__pk):
     dandiset = get_object_or_404(Dandiset, pk=dandiset__pk)
     serializer = DraftVersionDetailSerializer(dandiset.draft_version)
-    return Response(serializer.data)
+    response = Response(serializer.data)
+    # Drafts are mutable, so caches must always revalidate them
+    patch_cache_control(response, no_cache=True)
+    patch_vary_headers(response, ['Accept'])
+    return response
 
 
 @api_view(['POST'])
 @permission_required_or_403('owner', (DraftVersion, 'dandiset__pk', 'dandiset__pk'))
 @permission_classes([IsAuthenticatedOrReadOnly])
 def draft_lock_view(request, dandiset__pk):
+    """
+    Lock the draft, e.g. for an upload, until the lease expires.
+
+    The holder of the lock extends its lease by locking again, e.g. during a long upload. A lock
+    held by a publish is not extended.
+    """
     dandiset = get_object_or_404(Dandiset, pk=dandiset__pk)
-    dandiset.draft_version.lock(request.user)
-    dandiset.draft_version.save()
+    with _validation_error_as_400():
+        try:
+            dandiset.draft_version.lock(request.user)
+        except DjangoValidationError:
+            if not dandiset.draft_version.renew_lock(request.user, publish_task_id=''):
+                raise
     serializer = DraftVersionSerializer(dandiset.draft_version)
     return Response(serializer.data)
 
@@ -72,22 +193,76 @@ def draft_lock_view(request, dandiset__pk):
 @permission_classes([IsAuthenticatedOrReadOnly])
 def draft_unlock_view(request, dandiset__pk):
     dandiset = get_object_or_404(Dandiset, pk=dandiset__pk)
-    dandiset.draft_version.unlock(request.user)
-    dandiset.draft_version.save()
+    with _validation_error_as_400():
+        dandiset.draft_version.unlock(request.user)
     serializer = DraftVersionSerializer(dandiset.draft_version)
     return Response(serializer.data)
 
 
-@api_view(['POST'])
+class DraftPublishSerializer(serializers.Serializer):
+    task_id = serializers.CharField(allow_null=True)
+    in_progress = serializers.BooleanField()
+
+
+@swagger_auto_schema(
+    method='POST',
+    manual_parameters=[
+        openapi.Parameter(
+            'Idempotency-Key',
+            openapi.IN_HEADER,
+            description='Identifies retries of the same request; defaults to the draft content',
+            type=openapi.TYPE_STRING,
+        )
+    ],
+    responses={202: DraftPublishSerializer},
+)
+@swagger_auto_schema(method='GET', responses={200: DraftPublishSerializer})
+@api_view(['GET', 'POST'])
 @permission_required_or_403('owner', (DraftVersion, 'dandiset__pk', 'dandiset__pk'))
 @permission_classes([IsAuthenticatedOrReadOnly])
 def draft_publish_view(request, dandiset__pk):
-    dandiset = get_object_or_404(Dandiset, pk=dandiset__pk)
-    # Locking will fail if the draft is currently locked
-    # We want the draft to stay locked until publish completes or fails
-    dandiset.draft_version.lock(request.user)
-    publish_version.delay(dandiset.id, request.user.id)
-    return Response(status=status.HTTP_204_NO_CONTENT)
+    """
+    Publish the draft in the background, or return the publish in progress.
+
+    Repeated requests to publish are collapsed into the publish in progress, if any: requests
+    with the same Idempotency-Key header, or without one, while the draft content is the same.
+    """
+    draft_version = get_object_or_404(Dandiset, pk=dandiset__pk).draft_version
+
+    if request.method == 'GET':
+        in_progress = draft_version.locked and bool(draft_version.publish_task_id)
+        return Response(
+            DraftPublishSerializer(
+                {
+                    'task_id': draft_version.publish_task_id if in_progress else None,
+                    'in_progress': in_progress,
+                }
+            ).data
+        )
+
+    idempotency_key = request.headers.get('Idempotency-Key')
+    if idempotency_key:
+        publish_token = hashlib.sha256(f'key:{idempotency_key}'.encode()).hexdigest()
+    else:
+        publish_token = draft_version.publish_state_token()
+
+    # Locking will fail if the draft is currently locked, unless by the same publish
+    # We want the draft to stay locked until publish completes or fails; the publish task renews
+    # the lease while it runs
+    with _validation_error_as_400():
+        task_id, created = draft_version.lock_for_publish(request.user, publish_token)
+    if created:
+        try:
+            publish_version.apply_async(
+                (draft_version.dandiset_id, request.user.id, task_id), task_id=task_id
+            )
+        except Exception:
+            draft_version.unlock(request.user, task_id)
+            raise
+    return Response(
+        DraftPublishSerializer({'task_id': task_id, 'in_progress': True}).data,
+        status=status.HTTP_202_ACCEPTED,
+    )
 
 
 @swagger_auto_schema(
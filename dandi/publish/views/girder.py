@@ -0,0 +1,59 @@
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import serializers, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from dandi.publish.models import Dandiset
+from dandi.publish.tasks import schedule_draft_sync
+
+# The maximum number of events accepted by one request
+GIRDER_EVENTS_MAX = 1000
+
+
+class GirderEventSerializer(serializers.Serializer):
+    model = serializers.ChoiceField(choices=['folder', 'item'])
+    id = serializers.RegexField(f'^{Dandiset.GIRDER_ID_REGEX}$')
+
+
+class GirderEventsSerializer(serializers.Serializer):
+    events = serializers.ListField(
+        child=GirderEventSerializer(), min_length=1, max_length=GIRDER_EVENTS_MAX
+    )
+
+
+@swagger_auto_schema(
+    method='POST',
+    request_body=GirderEventsSerializer,
+    responses={
+        202: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={'scheduled': openapi.Schema(type=openapi.TYPE_INTEGER)},
+        )
+    },
+)
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def girder_events_view(request):
+    """
+    Receive notifications of changed folders and items in Girder.
+
+    The drafts whose folders changed are synced shortly after, together with the drafts of any
+    other changes in the meantime. Draft metadata is only stored on draft folders, so changes to
+    other folders and to items are ignored.
+    """
+    serializer = GirderEventsSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+
+    folder_ids = {
+        event['id'] for event in serializer.validated_data['events'] if event['model'] == 'folder'
+    }
+    draft_folder_ids = list(
+        Dandiset.objects.filter(draft_folder_id__in=folder_ids).values_list(
+            'draft_folder_id', flat=True
+        )
+    )
+    if draft_folder_ids:
+        schedule_draft_sync(draft_folder_ids)
+    return Response({'scheduled': len(draft_folder_ids)}, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,28 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from dandi.publish import metrics
+from dandi.publish.storage import STORAGE_OPERATIONS
+
+
+@api_view()
+@permission_classes([IsAdminUser])
+def storage_metrics_view(request):
+    """
+    Return the count and latency histogram of each operation on the object store.
+
+    Each histogram bucket counts the operations which took at most "le" seconds, and more than
+    the previous bucket's bound. The metrics are those of the process serving this request.
+    """
+    return Response(
+        {
+            operation: stats
+            for operation, stats in zip(
+                STORAGE_OPERATIONS,
+                metrics.get_stats(
+                    [f'storage:{operation}' for operation in STORAGE_OPERATIONS]
+                ).values(),
+            )
+        }
+    )
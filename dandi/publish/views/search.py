@@ -1,14 +1,30 @@
-from django.contrib.postgres.search import SearchVector
-from django.db.models import TextField
-from django.db.models.functions import Cast
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import OperationalError, connection, transaction
+from django.db.models import BooleanField, Case, Exists, F, OuterRef, Sum, When
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
+from psycopg2 import errorcodes
 from rest_framework.decorators import api_view
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
-from dandi.publish.models import Version
+from dandi.publish import search_cache
+from dandi.publish.models import Asset, Version, VersionFacet, VersionKeyword
+from dandi.publish.models.common import TrigramWordSimilarity
+from dandi.publish.views.common import DandiPagination
 from dandi.publish.views.version import VersionSerializer
 
+# Ranking is only meaningful for the first results, so deep pagination is not allowed
+SEARCH_RESULT_WINDOW = 1000
+# The number of most common values to return for each facet
+FACET_VALUE_LIMIT = 20
+# Suggestions are requested on every keystroke, so they must be cheap
+SUGGEST_MIN_LENGTH = 2
+SUGGEST_DEFAULT_LIMIT = 10
+SUGGEST_MAX_LIMIT = 25
+# The latency budget of suggestion queries, in milliseconds
+SUGGEST_TIMEOUT = 200
+
 
 @swagger_auto_schema(
     method='GET',
@@ -18,14 +34,186 @@ from dandi.publish.views.version import VersionSerializer
             openapi.IN_QUERY,
             description='Search published dandisets',
             type=openapi.TYPE_STRING,
-        )
+        ),
+        openapi.Parameter(
+            'latest',
+            openapi.IN_QUERY,
+            description='Only return the most recent matching version of each dandiset',
+            type=openapi.TYPE_BOOLEAN,
+        ),
     ],
+    responses={200: VersionSerializer(many=True)},
 )
 @api_view()
 def search_view(request):
-    if 'search' not in request.query_params:
+    return Response(search_cache.get_or_compute(request, lambda: _search(request)))
+
+
+def _search(request):
+    paginator = DandiPagination()
+
+    search = request.query_params.get('search')
+    if search:
+        query = SearchQuery(search, config=Version.SEARCH_CONFIG)
+        versions = Version.objects.filter(search_vector=query)
+        if request.query_params.get('latest') in ['true', 'True', '1']:
+            latest_versions = (
+                versions.order_by('dandiset_id', '-version').distinct('dandiset_id').values('pk')
+            )
+            versions = Version.objects.filter(pk__in=latest_versions)
+        versions = (
+            versions.annotate(rank=SearchRank(F('search_vector'), query))
+            .order_by('-rank', 'pk')
+            .defer('metadata', 'search_vector')[:SEARCH_RESULT_WINDOW]
+        )
+    else:
+        versions = Version.objects.none()
+
+    page = paginator.paginate_queryset(versions, request)
+    return paginator.get_paginated_response(VersionSerializer(page, many=True).data).data
+
+
+@swagger_auto_schema(
+    method='GET',
+    manual_parameters=[
+        openapi.Parameter(
+            facet,
+            openapi.IN_QUERY,
+            description=f'Only match versions with an asset of this "{facet}"',
+            type=openapi.TYPE_STRING,
+        )
+        for facet in VersionFacet.FACETS
+    ],
+)
+@api_view()
+def asset_search_view(request):
+    """
+    Search published versions by the metadata of their assets.
+
+    Alongside the matching versions, this returns the most common values of each facet among all
+    assets of the matching versions.
+    """
+    return Response(search_cache.get_or_compute(request, lambda: _asset_search(request)))
+
+
+def _asset_search(request):
+    paginator = DandiPagination()
+
+    filters = {
+        facet: VersionFacet.normalize_value(request.query_params[facet])
+        for facet in VersionFacet.FACETS
+        if facet in request.query_params
+    }
+    versions = Version.objects.defer('metadata', 'search_vector')
+    # Values are compared as stored in the facets, so e.g. a numeric session_id matches too. The
+    # facets are indexed by value, and are only as many as the distinct values of each version.
+    for facet, value in filters.items():
+        versions = versions.filter(
+            pk__in=VersionFacet.objects.filter(facet=facet, value=value).values('version')
+        )
+    if len(filters) > 1:
+        # Every filter must match the same asset, through the facet columns of the assets of the
+        # remaining versions, which are indexed by version
+        versions = versions.filter(Exists(Asset.objects.filter(version=OuterRef('pk'), **filters)))
+
+    page = paginator.paginate_queryset(versions, request)
+    data = paginator.get_paginated_response(VersionSerializer(page, many=True).data).data
+
+    facet_counts = (
+        VersionFacet.objects.filter(version__in=versions.values('pk'))
+        .values('value')
+        .annotate(total=Sum('count'))
+        .order_by('-total', 'value')
+    )
+    facets = {
+        facet: [
+            {'value': row['value'], 'count': row['total']}
+            for row in facet_counts.filter(facet=facet)[:FACET_VALUE_LIMIT]
+        ]
+        for facet in VersionFacet.FACETS
+    }
+    data['facets'] = facets
+    return data
+
+
+@swagger_auto_schema(
+    method='GET',
+    manual_parameters=[
+        openapi.Parameter(
+            'q',
+            openapi.IN_QUERY,
+            description='The partial name or keyword to complete',
+            type=openapi.TYPE_STRING,
+        ),
+        openapi.Parameter(
+            'limit',
+            openapi.IN_QUERY,
+            description=f'The maximum number of suggestions (at most {SUGGEST_MAX_LIMIT})',
+            type=openapi.TYPE_INTEGER,
+        ),
+    ],
+)
+@api_view()
+def suggest_view(request):
+    """
+    Suggest names and keywords of published dandisets, as a query is typed.
+
+    Values starting with the query come first, followed by the values with the most similar words.
+    If the suggestions cannot be found within the latency budget, none are returned.
+    """
+    try:
+        return Response(search_cache.get_or_compute(request, lambda: _suggest(request)))
+    except OperationalError as e:
+        if getattr(e.__cause__, 'pgcode', None) != errorcodes.QUERY_CANCELED:
+            raise
+        # Suggestions are only a convenience, so it's better to return none than to be late
         return Response([])
-    versions = Version.objects.annotate(search=SearchVector(Cast('metadata', TextField()))).filter(
-        search__contains=request.query_params['search']
+
+
+def _suggest(request):
+    query = ' '.join(request.query_params.get('q', '').split())
+    try:
+        limit = int(request.query_params.get('limit', SUGGEST_DEFAULT_LIMIT))
+    except ValueError:
+        raise ValidationError('Query parameter "limit" must be an integer')
+    limit = max(0, min(limit, SUGGEST_MAX_LIMIT))
+    if len(query) < SUGGEST_MIN_LENGTH or not limit:
+        return []
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL statement_timeout = %s', [SUGGEST_TIMEOUT])
+        candidates = [
+            (*row, 'name') for row in _suggestion_candidates(Version, 'name', query, limit)
+        ] + [
+            (*row, 'keyword')
+            for row in _suggestion_candidates(VersionKeyword, 'keyword', query, limit)
+        ]
+
+    candidates.sort(key=lambda row: (not row[1], -row[2], row[0]))
+    return [{'value': value, 'type': type_} for value, _, _, type_ in candidates[:limit]]
+
+
+def _suggestion_candidates(model, field: str, query: str, limit: int):
+    # Only the word similarity filter is served by the trigram index, so prefix matching is only
+    # used for ranking; any prefix of a value is also similar enough to one of its words
+    return (
+        model.objects.filter(**{f'{field}__trigram_word_similar': query})
+        .annotate(
+            is_prefix=Case(
+                When(**{f'{field}__istartswith': query}, then=True),
+                default=False,
+                output_field=BooleanField(),
+            ),
+            similarity=TrigramWordSimilarity(query, field),
+        )
+        .order_by('-is_prefix', '-similarity', field)
+        .values_list(field, 'is_prefix', 'similarity')
+        .distinct()[:limit]
     )
-    return Response(VersionSerializer(versions, many=True).data)
+
+
+@api_view()
+def search_cache_view(request):
+    """Return the hit ratio of the search result cache, in the process serving this request."""
+    return Response(search_cache.get_stats())
@@ -1,21 +1,75 @@
-from django.contrib.auth.models import User
+from django.db.models.functions import Trunc
+from django.utils.cache import patch_cache_control
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import serializers
 from rest_framework.decorators import api_view
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
-from dandi.publish.models import Asset, Dandiset
+from dandi.publish.models import ArchiveStats, StatsSnapshot
+
+# The statistics are only shown on the landing page, so they may be slightly stale
+STATS_MAX_AGE = 60
+# Snapshots are recorded hourly
+STATS_HISTORY_MAX_AGE = 60 * 60
+STATS_HISTORY_INTERVALS = ['day', 'week', 'month', 'year']
+
+
+class StatsSnapshotSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StatsSnapshot
+        fields = ['date', 'dandiset_count', 'published_dandiset_count', 'user_count', 'size']
 
 
 @api_view()
 def stats_view(self):
-    dandiset_count = Dandiset.objects.count()
-    published_dandiset_count = Dandiset.published_count()
-    user_count = User.objects.count()
-    size = Asset.total_size()
-    return Response(
+    stats = ArchiveStats.get()
+    response = Response(
         {
-            'dandiset_count': dandiset_count,
-            'published_dandiset_count': published_dandiset_count,
-            'user_count': user_count,
-            'size': size,
+            'dandiset_count': stats.dandiset_count,
+            'published_dandiset_count': stats.published_dandiset_count,
+            'user_count': stats.user_count,
+            'size': stats.size,
+            'unique_size': stats.unique_size,
         }
     )
+    patch_cache_control(response, public=True, max_age=STATS_MAX_AGE)
+    return response
+
+
+@swagger_auto_schema(
+    method='GET',
+    manual_parameters=[
+        openapi.Parameter(
+            'interval',
+            openapi.IN_QUERY,
+            description='Only return the last snapshot of each interval',
+            type=openapi.TYPE_STRING,
+            enum=STATS_HISTORY_INTERVALS,
+            default='day',
+        ),
+    ],
+    responses={200: StatsSnapshotSerializer(many=True)},
+)
+@api_view()
+def stats_history_view(request):
+    """Return the archive statistics over time."""
+    interval = request.query_params.get('interval', 'day')
+    if interval not in STATS_HISTORY_INTERVALS:
+        raise ValidationError(
+            f'Query parameter "interval" must be one of: {", ".join(STATS_HISTORY_INTERVALS)}'
+        )
+
+    snapshots = StatsSnapshot.objects.all()
+    if interval != 'day':
+        # The statistics are cumulative, so each interval is represented by its last snapshot
+        snapshots = (
+            snapshots.annotate(period=Trunc('date', interval))
+            .order_by('period', '-date')
+            .distinct('period')
+        )
+
+    response = Response(StatsSnapshotSerializer(snapshots, many=True).data)
+    patch_cache_control(response, public=True, max_age=STATS_HISTORY_MAX_AGE)
+    return response
@@ -1,10 +1,18 @@
+import json
+
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
 from rest_framework import serializers
+from rest_framework.decorators import api_view
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.viewsets import ReadOnlyModelViewSet
 from rest_framework_extensions.mixins import DetailSerializerMixin, NestedViewSetMixin
 
-from dandi.publish.models import Version
-from dandi.publish.views.common import DandiPagination
+from dandi.publish.models import Asset, Version
+from dandi.publish.views.common import DandiPagination, published_version_cache
 from dandi.publish.views.dandiset import DandisetSerializer
 
 
@@ -31,8 +39,10 @@ class VersionDetailSerializer(VersionSerializer):
 
 
 class VersionViewSet(NestedViewSetMixin, DetailSerializerMixin, ReadOnlyModelViewSet):
-    queryset = Version.objects.all().select_related('dandiset')
-    queryset_detail = queryset
+    # Aggregate statistics are stored on each row, so listing is a single query per page.
+    # Metadata may be large, so it's only fetched when it will be serialized.
+    queryset = Version.objects.all().select_related('dandiset').defer('metadata', 'search_vector')
+    queryset_detail = Version.objects.all().select_related('dandiset').defer('search_vector')
 
     permission_classes = [IsAuthenticatedOrReadOnly]
     serializer_class = VersionSerializer
@@ -41,3 +51,28 @@ class VersionViewSet(NestedViewSetMixin, DetailSerializerMixin, ReadOnlyModelVie
 
     lookup_field = 'version'
     lookup_value_regex = Version.VERSION_REGEX
+
+    @method_decorator(published_version_cache('dandiset__pk', 'version'))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+
+@swagger_auto_schema(
+    method='GET',
+    responses={
+        200: openapi.Response(
+            'Newline-delimited JSON objects, each describing an asset which was "added", '
+            '"removed", or "modified" between the versions, in path order.'
+        )
+    },
+)
+@api_view()
+def version_diff_view(request, dandiset__pk, version, other_version):
+    """Stream the changes to assets from one published version to another."""
+    old_version = get_object_or_404(Version, dandiset__pk=dandiset__pk, version=version)
+    new_version = get_object_or_404(Version, dandiset__pk=dandiset__pk, version=other_version)
+
+    changes = Asset.diff(old_version, new_version)
+    return StreamingHttpResponse(
+        (f'{json.dumps(change)}\n' for change in changes), content_type='application/x-ndjson'
+    )
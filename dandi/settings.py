@@ -46,11 +46,66 @@ class DandiConfig(ConfigMixin):
     def before_binding(configuration: Type[ComposedConfiguration]):
         configuration.INSTALLED_APPS += ['dandi.publish.apps.PublishConfig', 'guardian']
         configuration.AUTHENTICATION_BACKENDS += ['guardian.backends.ObjectPermissionBackend']
+        # This must be first, to measure everything done for a request
+        configuration.MIDDLEWARE = [
+            'dandi.publish.middleware.RequestTimingMiddleware'
+        ] + configuration.MIDDLEWARE
+
+    # e.g. "redis://host:6379/0" in production; the default is only local to each process
+    CACHES = values.CacheURLValue('locmem://')
+
+    # Publishes may run for hours, so they have a queue of their own, which can't delay syncs
+    # and maintenance. See the worker process types of the Procfile, which consume these queues.
+    CELERY_TASK_DEFAULT_QUEUE = 'maintenance'
+    CELERY_TASK_ROUTES = {
+        'dandi.publish.tasks.publish_version': {'queue': 'publish'},
+        'dandi.publish.tasks.sync_dandisets': {'queue': 'sync'},
+        'dandi.publish.tasks.sync_pending_drafts': {'queue': 'sync'},
+        'dandi.publish.tasks.reconcile_dandisets': {'queue': 'sync'},
+    }
+    # Each worker process only reserves the task it runs, so a long task never holds back others
+    CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+    # Queues are declared with priorities, from 0 (lowest) to this
+    CELERY_TASK_QUEUE_MAX_PRIORITY = 9
+    CELERY_TASK_DEFAULT_PRIORITY = 4
+
+    CELERY_BEAT_SCHEDULE = {
+        # The statistics are maintained incrementally, so this only corrects rare drift
+        'reconcile-archive-stats': {
+            'task': 'dandi.publish.tasks.reconcile_archive_stats',
+            'schedule': 60 * 60 * 24,
+        },
+        'record-stats-snapshot': {
+            'task': 'dandi.publish.tasks.record_stats_snapshot',
+            'schedule': 60 * 60,
+        },
+        'release-expired-locks': {
+            'task': 'dandi.publish.tasks.release_expired_locks',
+            'schedule': 60 * 5,
+        },
+        'reconcile-dandisets': {
+            'task': 'dandi.publish.tasks.reconcile_dandisets',
+            'schedule': 60 * 60 * 24,
+        },
+    }
 
     DANDI_DANDISETS_BUCKET_NAME = values.Value(environ_required=True)
     DANDI_GIRDER_API_URL = values.URLValue(environ_required=True)
     DANDI_GIRDER_API_KEY = values.Value(environ_required=True)
 
+    # The size of each pool of connections to the object store, which are kept alive while idle
+    DANDI_STORAGE_MAX_POOL_CONNECTIONS = values.IntegerValue(50)
+    DANDI_STORAGE_TCP_KEEPALIVE = values.BooleanValue(True)
+
+    # Measure the queries, cache hits and storage calls of each request, and log them as warnings
+    # above these thresholds
+    DANDI_REQUEST_TIMING = values.BooleanValue(False)
+    DANDI_REQUEST_TIMING_SLOW_DURATION = values.FloatValue(1.0)
+    DANDI_REQUEST_TIMING_MAX_QUERIES = values.IntegerValue(50)
+
+    # A pre-rendered OpenAPI schema, to serve instead of rendering it in each process
+    DANDI_OPENAPI_SCHEMA_FILE = values.Value(None)
+
 
 class DevelopmentConfiguration(DandiConfig, DevelopmentBaseConfiguration):
     pass
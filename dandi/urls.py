@@ -1,22 +1,29 @@
 from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path, register_converter
-from drf_yasg import openapi
-from drf_yasg.views import get_schema_view
-from rest_framework import permissions
 from rest_framework_extensions.routers import ExtendedSimpleRouter
 
+from dandi.publish.models import Version
+from dandi.publish.openapi import SchemaView
 from dandi.publish.views import (
     AssetViewSet,
     DandisetViewSet,
+    DraftVersionViewSet,
     VersionViewSet,
+    asset_search_view,
     draft_lock_view,
     draft_owners_view,
     draft_publish_view,
     draft_unlock_view,
     draft_view,
+    girder_events_view,
+    search_cache_view,
     search_view,
+    stats_history_view,
     stats_view,
+    storage_metrics_view,
+    suggest_view,
+    version_diff_view,
 )
 
 router = ExtendedSimpleRouter()
@@ -38,17 +45,7 @@ router = ExtendedSimpleRouter()
         ],
     )
 )
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title='DANDI Archive',
-        default_version='v1',
-        description='The BRAIN Initiative archive for publishing and sharing '
-        'cellular neurophysiology data',
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+router.register(r'drafts', DraftVersionViewSet, basename='draft')
 
 
 class DandisetIDConverter:
@@ -61,19 +58,41 @@ class DandisetIDConverter:
         return value
 
 
+class VersionConverter:
+    regex = Version.VERSION_REGEX
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
+
+
 register_converter(DandisetIDConverter, 'dandiset_id')
+register_converter(VersionConverter, 'version')
 urlpatterns = [
     path('api/', include(router.urls)),
+    path('api/girder/events/', girder_events_view),
+    path('api/metrics/storage/', storage_metrics_view),
     path('api/search/', search_view),
+    path('api/search/assets/', asset_search_view),
+    path('api/search/cache/', search_cache_view),
+    path('api/search/suggest/', suggest_view),
     path('api/stats/', stats_view),
+    path('api/stats/history/', stats_history_view),
     path(r'api/dandisets/<dandiset_id:dandiset__pk>/draft/', draft_view),
     path(r'api/dandisets/<dandiset_id:dandiset__pk>/draft/lock/', draft_lock_view),
     path(r'api/dandisets/<dandiset_id:dandiset__pk>/draft/unlock/', draft_unlock_view),
     path(r'api/dandisets/<dandiset_id:dandiset__pk>/draft/publish/', draft_publish_view),
     path(r'api/dandisets/<dandiset_id:dandiset__pk>/draft/owners/', draft_owners_view),
+    path(
+        r'api/dandisets/<dandiset_id:dandiset__pk>/versions/<version:version>/'
+        r'diff/<version:other_version>/',
+        version_diff_view,
+    ),
     path('admin/', admin.site.urls),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    path('swagger/', SchemaView.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+    path('redoc/', SchemaView.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,77 @@
+"""
+Measure the throughput and latency of the API at a high concurrency.
+
+Run this against each deployment to compare, e.g. Gunicorn with sync and with gthread workers:
+
+    python dev/load_test.py http://localhost:8000 --concurrency 64 --requests 2000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import httpx
+
+DEFAULT_PATHS = [
+    '/api/stats/',
+    '/api/dandisets/',
+    '/api/search/?search=test',
+    '/api/search/suggest/?q=te',
+]
+
+
+async def _worker(
+    client: httpx.AsyncClient, paths: List[str], queue: asyncio.Queue, latencies: List[float]
+) -> int:
+    errors = 0
+    while True:
+        try:
+            index = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return errors
+        start = time.monotonic()
+        try:
+            resp = await client.get(paths[index % len(paths)])
+            errors += resp.status_code >= 400
+        except httpx.HTTPError:
+            errors += 1
+        latencies.append(time.monotonic() - start)
+
+
+async def _run(base_url: str, paths: List[str], concurrency: int, requests: int) -> None:
+    queue: asyncio.Queue = asyncio.Queue()
+    for index in range(requests):
+        queue.put_nowait(index)
+    latencies: List[float] = []
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        start = time.monotonic()
+        errors = await asyncio.gather(
+            *(_worker(client, paths, queue, latencies) for _ in range(concurrency))
+        )
+        elapsed = time.monotonic() - start
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f'{requests} requests in {elapsed:.1f}s, with {concurrency} concurrent clients')
+    print(f'Throughput: {requests / elapsed:.1f} requests/s')
+    print(f'Latency: p50 {quantiles[49] * 1000:.0f}ms, p99 {quantiles[98] * 1000:.0f}ms')
+    print(f'Errors: {sum(errors)}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('base_url', help='e.g. http://localhost:8000')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument(
+        '--path', action='append', dest='paths', help='A path to request; may be repeated'
+    )
+    args = parser.parse_args()
+    asyncio.run(_run(args.base_url, args.paths or DEFAULT_PATHS, args.concurrency, args.requests))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,14 @@
+"""
+Configuration of the Gunicorn web server.
+
+Requests mostly wait on I/O (the database, the object store and Girder), so each worker process
+serves several requests concurrently with threads, rather than blocking on each one in turn.
+The number of worker processes is set by the WEB_CONCURRENCY environment variable.
+"""
+
+import os
+
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))
+# Keep connections from the router alive between requests
+keepalive = 5
@@ -38,7 +38,7 @@ setup(
         'celery',
         'django==3.0.9',
         'django-admin-display',
-        'django-configurations[database,email]',
+        'django-configurations[cache,database,email]',
         'django-cors-headers',
         'django-extensions',
         'django-filter',
@@ -52,6 +52,7 @@ setup(
         'rich',
         'whitenoise[brotli]',
         # Production-only
+        'django-redis',
         'django-storages[boto3]',
         'gunicorn',
         'sentry-sdk',